@@ -4,14 +4,100 @@ LLM backend handling for nlsh.
 This module provides functionality for interacting with different LLM backends.
 """
 
+import asyncio
+import functools
 import sys
-import re
+import time
 import traceback
-from typing import Dict, List, Optional, Any, Union
+from typing import Awaitable, Dict, List, Optional, Any, Union
 
 import openai
 from nlsh.image_utils import prepare_image_for_api, is_image_type
 
+# Verbose streaming echoes deltas to stderr once this many are pending or
+# this many seconds have passed since the last write
+STREAM_FLUSH_CHUNKS = 16
+STREAM_FLUSH_INTERVAL = 0.03
+
+# Characters allowed in a code fence's language tag (```bash, ```c++, ...)
+_FENCE_LANGUAGE_CHARS = frozenset("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_+-")
+
+
+def _unwrap_code_fences(text: str) -> str:
+    """Replace each ```[language]\ncode\n``` block with its code.
+    
+    A single left-to-right pass using str.find; equivalent to substituting
+    the pattern r"```(?:[a-zA-Z0-9_+-]+)?\n?(.*?)\n?```" (DOTALL) with its
+    group, without the regex engine's per-character lazy matching.
+    
+    Args:
+        text: Text that may contain fenced code blocks.
+        
+    Returns:
+        str: Text with the fences removed.
+    """
+    parts = []
+    pos = 0
+    length = len(text)
+    while True:
+        start = text.find("```", pos)
+        if start == -1:
+            break
+        
+        # Skip the optional language tag and newline after the opening fence
+        code_start = start + 3
+        while code_start < length and text[code_start] in _FENCE_LANGUAGE_CHARS:
+            code_start += 1
+        if code_start < length and text[code_start] == "\n":
+            code_start += 1
+        
+        end = text.find("```", code_start)
+        if end == -1:
+            break
+        
+        parts.append(text[pos:start])
+        if end > code_start and text[end - 1] == "\n":
+            parts.append(text[code_start:end - 1])
+        else:
+            parts.append(text[code_start:end])
+        pos = end + 3
+    
+    if not parts:
+        return text
+    parts.append(text[pos:])
+    return "".join(parts)
+
+
+def _leading_code_block_end(text: str) -> int:
+    """Find where a code block that opens the text is closed.
+    
+    Used to drop everything after a code block that opens a response (and,
+    while streaming, to stop reading there); anything after it is commentary.
+    
+    Args:
+        text: Response text received so far.
+        
+    Returns:
+        int: Index just past the closing fence, or -1 if the text does not
+            start with a code fence or the fence is not closed yet.
+    """
+    start = len(text) - len(text.lstrip())
+    if not text.startswith("```", start):
+        return -1
+    
+    code_start = start + 3
+    length = len(text)
+    while code_start < length and text[code_start] in _FENCE_LANGUAGE_CHARS:
+        code_start += 1
+    # The language tag may still be arriving
+    if code_start == length:
+        return -1
+    if text[code_start] == "\n":
+        code_start += 1
+    
+    end = text.find("```", code_start)
+    return -1 if end == -1 else end + 3
+
 
 def strip_markdown_code_blocks(text: str) -> str:
     """Strip Markdown code blocks from text.
@@ -29,17 +115,40 @@ def strip_markdown_code_blocks(text: str) -> str:
         str: Text with code blocks stripped of their Markdown formatting.
     """
     # Handle multiline code blocks with or without language info
-    # Pattern: ```[language]\ncode\n```
-    pattern = r"```(?:[a-zA-Z0-9_+-]+)?\n?(.*?)\n?```"
-    result = re.sub(pattern, r"\1", text, flags=re.DOTALL)
+    result = _unwrap_code_fences(text)
     
     # Handle the case where the entire response is enclosed in single backticks
     # Pattern: `code`
     stripped_result = result.strip()
     if stripped_result.startswith("`") and stripped_result.endswith("`"):
-        result = stripped_result[1:-1]
+        return stripped_result[1:-1].strip()
+    
+    return stripped_result
+
+
+def _usage_to_dict(usage: Any) -> Optional[Dict[str, int]]:
+    """Convert an API usage object to a plain dictionary.
+    
+    Args:
+        usage: Usage object from a chat completion response, or None.
+        
+    Returns:
+        Optional[Dict[str, int]]: Prompt and completion token counts, plus the
+            number of prompt tokens served from the provider's prefix cache
+            when the server reports it; None if usage was not reported.
+    """
+    if usage is None:
+        return None
     
-    return result.strip()
+    result = {
+        "prompt_tokens": usage.prompt_tokens,
+        "completion_tokens": usage.completion_tokens,
+    }
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached_tokens = getattr(details, "cached_tokens", None)
+    if cached_tokens is not None:
+        result["cached_tokens"] = cached_tokens
+    return result
 
 
 class LLMBackend:
@@ -58,6 +167,11 @@ class LLMBackend:
         self.model = config.get("model", "")
         self.is_reasoning_model = config.get("is_reasoning_model", False)
         self.timeout = float(config.get("timeout", 120.0))
+        self._connection_check_pending = False
+        # Token usage reported for the most recent request, if any
+        self.last_usage = None
+        # Cleared if the server rejects stream_options on streaming requests
+        self._stream_usage_supported = True
         
         # Auto-detect reasoning models by name if not explicitly set
         if not self.is_reasoning_model and "reason" in self.name.lower():
@@ -86,11 +200,11 @@ class LLMBackend:
             if not self.api_key or len(self.api_key.strip()) < 8:
                 raise ValueError(f"Invalid API key configuration for backend {self.name}")
         
-        # Configure OpenAI client
+        # Configure OpenAI client (async, so requests don't block the event loop)
         try:
             if is_local:
                 # For local endpoints, don't send any auth headers
-                self.client = openai.OpenAI(
+                self.client = openai.AsyncOpenAI(
                     base_url=self.url,
                     api_key="dummy-key",
                     timeout=self.timeout,
@@ -99,27 +213,65 @@ class LLMBackend:
                     }
                 )
                 
-                # Ensure both sync and async clients have no auth headers
-                for client_attr in ['_client', '_async_client']:
+                # Ensure the underlying HTTP client has no auth headers
+                for client_attr in ['_client']:
                     if hasattr(self.client, client_attr):
                         client = getattr(self.client, client_attr)
                         if hasattr(client, 'headers'):
                             client.headers.clear()
                             client.headers["Content-Type"] = "application/json"
             else:
-                self.client = openai.OpenAI(
+                self.client = openai.AsyncOpenAI(
                     base_url=self.url,
                     api_key=self.api_key,
                     timeout=self.timeout
                 )
-                # Test the connection with a minimal request
-                if not is_dummy_key:
-                    self.client.models.list()
+                # Test the connection with a minimal request. Rather than
+                # waiting for it here, it runs alongside the first generation
+                # request, which is dropped if the check fails.
+                self._connection_check_pending = not is_dummy_key
+        except Exception as e:
+            raise ValueError(f"Failed to initialize backend {self.name}: {str(e)}")
+
+    async def _check_connection(self) -> None:
+        """Test the connection to the backend with a minimal request.
+        
+        Raises:
+            ValueError: If authentication fails or the backend is unreachable.
+        """
+        try:
+            await self.client.models.list()
         except openai.AuthenticationError as e:
             raise ValueError(f"Authentication failed for backend {self.name}: {str(e)}")
         except Exception as e:
             raise ValueError(f"Failed to initialize backend {self.name}: {str(e)}")
 
+    async def _with_connection_check(self, request: Awaitable[str]) -> str:
+        """Run a generation request, checking the connection first if pending.
+        
+        The check and the request are issued together so the check adds no
+        round-trip to the first request; the request is cancelled if the
+        check fails.
+        
+        Args:
+            request: Generation request to run.
+            
+        Returns:
+            str: Result of the request.
+        """
+        if not self._connection_check_pending:
+            return await request
+        self._connection_check_pending = False
+        
+        generation = asyncio.ensure_future(request)
+        try:
+            await self._check_connection()
+        except BaseException:
+            generation.cancel()
+            await asyncio.gather(generation, return_exceptions=True)
+            raise
+        return await generation
+
     async def _generate_streaming_response(
         self, 
         messages: List[Dict[str, str]], 
@@ -135,40 +287,89 @@ class LLMBackend:
             max_tokens: Maximum tokens to generate.
             strip_markdown: Whether to strip markdown code blocks.
             
+        When strip_markdown is set and the response opens with a code block,
+        the stream is closed as soon as that block ends, so trailing
+        commentary is neither generated nor waited for. Token usage arrives
+        in the final chunk, so last_usage stays None for streams closed early
+        this way, and for servers that do not support stream_options.
+        
         Returns:
             str: Generated response.
         """
-        full_response = ""
+        response_parts = []
+        pending = []
+        # Whether the response may still turn out to open with a code fence
+        watch_fence = strip_markdown
+        response_head = ""
         sys.stderr.write("Reasoning: ")
+        sys.stderr.flush()
+        last_flush = time.monotonic()
         
-        # Call the API with streaming
-        stream = self.client.chat.completions.create(
-            model=self.model,
-            messages=messages,
-            temperature=temperature,
-            max_tokens=max_tokens,
-            n=1,
-            stream=True
-        )
+        # Call the API with streaming, asking for usage in the final chunk
+        request = {
+            "model": self.model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "n": 1,
+            "stream": True,
+        }
+        if self._stream_usage_supported:
+            request["stream_options"] = {"include_usage": True}
+        try:
+            stream = await self.client.chat.completions.create(**request)
+        except openai.BadRequestError:
+            if "stream_options" not in request:
+                raise
+            # Some OpenAI-compatible servers reject stream_options
+            self._stream_usage_supported = False
+            del request["stream_options"]
+            stream = await self.client.chat.completions.create(**request)
         
-        # Process the stream
-        for chunk in stream:
+        # Process the stream, echoing deltas to stderr in batches rather than
+        # writing and flushing every token
+        async for chunk in stream:
+            if getattr(chunk, "usage", None):
+                self.last_usage = _usage_to_dict(chunk.usage)
             if chunk.choices and len(chunk.choices) > 0:
                 delta = chunk.choices[0].delta
                 
                 # Handle reasoning content
                 if hasattr(delta, 'reasoning_content') and delta.reasoning_content:
-                    sys.stderr.write(delta.reasoning_content)
-                    sys.stderr.flush()
+                    pending.append(delta.reasoning_content)
                 
                 # Handle regular content
                 if hasattr(delta, 'content') and delta.content:
                     if not self.is_reasoning_model:
-                        sys.stderr.write(delta.content)
-                        sys.stderr.flush()
-                    full_response += delta.content
+                        pending.append(delta.content)
+                    response_parts.append(delta.content)
+                    
+                    # Stop once a response that opens with a code block closes it
+                    if watch_fence:
+                        if len(response_head) < 3:
+                            response_head = (response_head + delta.content).lstrip()[:3]
+                            watch_fence = "```".startswith(response_head)
+                        if watch_fence and "`" in delta.content:
+                            so_far = "".join(response_parts)
+                            fence_end = _leading_code_block_end(so_far)
+                            if fence_end != -1:
+                                response_parts = [so_far[:fence_end]]
+                                await stream.close()
+                                break
+                
+                if pending and (
+                    len(pending) >= STREAM_FLUSH_CHUNKS
+                    or time.monotonic() - last_flush >= STREAM_FLUSH_INTERVAL
+                ):
+                    sys.stderr.write("".join(pending))
+                    sys.stderr.flush()
+                    pending.clear()
+                    last_flush = time.monotonic()
         
-        sys.stderr.write("\n")
+        pending.append("\n")
+        sys.stderr.write("".join(pending))
+        sys.stderr.flush()
+        full_response = "".join(response_parts)
         
         # Process the response
         response_text = full_response.strip()
@@ -196,7 +397,7 @@ class LLMBackend:
             str: Generated response.
         """
         # Call the API without streaming
-        response = self.client.chat.completions.create(
+        response = await self.client.chat.completions.create(
             model=self.model,
             messages=messages,
             temperature=temperature,
@@ -204,11 +405,17 @@ class LLMBackend:
             n=1
         )
         
+        self.last_usage = _usage_to_dict(response.usage)
+        
         # Extract and process the content
         if response.choices and len(response.choices) > 0:
             content = response.choices[0].message.content.strip()
             
             if strip_markdown:
+                # Drop commentary after a leading code block, as streaming does
+                fence_end = _leading_code_block_end(content)
+                if fence_end != -1:
+                    content = content[:fence_end]
                 return strip_markdown_code_blocks(content)
 
             return content
@@ -219,7 +426,7 @@ class LLMBackend:
         self,
         prompt: str,
         system_context: str,
-        verbose: bool = False,
+        verbose: Union[bool, int] = False,
         strip_markdown: bool = True,
         max_tokens: int = 500,
         regeneration_count: int = 0,
@@ -231,7 +438,8 @@ class LLMBackend:
         Args:
             prompt: User prompt.
             system_context: System context information.
-            verbose: Whether to print reasoning tokens to stderr.
+            verbose: Verbosity level; if truthy, reasoning tokens are streamed to
+                stderr, and above 1 tracebacks are printed on errors.
             strip_markdown: Whether to strip markdown code blocks from the response.
             max_tokens: Maximum tokens to generate.
             regeneration_count: Number of times the response has been regenerated.
@@ -241,6 +449,7 @@ class LLMBackend:
         Returns:
             str: Generated response.
         """
+        self.last_usage = None
         try:
             # Create messages for the chat completion
             messages = [
@@ -279,13 +488,14 @@ class LLMBackend:
             
             # Generate response with or without streaming
             if verbose:
-                return await self._generate_streaming_response(
+                request = self._generate_streaming_response(
                     messages, temperature, max_tokens, strip_markdown
                 )
             else:
-                return await self._generate_non_streaming_response(
+                request = self._generate_non_streaming_response(
                     messages, temperature, max_tokens, strip_markdown
                 )
+            return await self._with_connection_check(request)
                 
         except openai.AuthenticationError as e:
             error_msg = str(e)
@@ -296,7 +506,61 @@ class LLMBackend:
             raise ValueError(f"Authentication failed for backend {self.name}: {error_msg}")
         except Exception as e:
             print(f"Error generating command: {str(e)}", file=sys.stderr)
-            traceback.print_exc(file=sys.stderr)
+            if verbose > 1:
+                traceback.print_exc(file=sys.stderr)
+            raise
+
+    async def generate_batch(
+        self,
+        prompts: List[str],
+        system_context: str,
+        max_concurrent: int = 8,
+        regeneration_counts: Optional[List[int]] = None,
+        **kwargs: Any
+    ) -> List[str]:
+        """Generate responses for several prompts sharing one system context.
+        
+        Requests are issued concurrently, with at most max_concurrent in
+        flight, so servers that batch concurrent requests can process them
+        together and reuse the shared system prompt prefix. Responses are
+        never streamed, since concurrent streams would interleave on stderr.
+        If any request fails, the others are cancelled and the error is
+        raised.
+        
+        Args:
+            prompts: User prompts.
+            system_context: System context shared by all prompts.
+            max_concurrent: Maximum number of requests in flight at once.
+            regeneration_counts: Optional regeneration count per prompt, used
+                to sample each request at a different temperature.
+            **kwargs: Extra arguments for generate_response.
+            
+        Returns:
+            List[str]: Generated responses, in the same order as prompts.
+        """
+        semaphore = asyncio.Semaphore(max(1, max_concurrent))
+        regeneration_count = kwargs.pop("regeneration_count", 0)
+        if regeneration_counts is None:
+            regeneration_counts = [regeneration_count] * len(prompts)
+        kwargs["verbose"] = False
+        
+        async def _generate(prompt: str, regeneration_count: int) -> str:
+            async with semaphore:
+                return await self.generate_response(
+                    prompt, system_context, regeneration_count=regeneration_count, **kwargs
+                )
+        
+        tasks = [
+            asyncio.ensure_future(_generate(prompt, regeneration_count))
+            for prompt, regeneration_count in zip(prompts, regeneration_counts)
+        ]
+        try:
+            return list(await asyncio.gather(*tasks))
+        except BaseException:
+            # Don't leave the other requests running after the first failure
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
             raise
 
     def _calculate_temperature(self, regeneration_count: int) -> float:
@@ -379,3 +643,19 @@ class BackendManager:
             "stdin:\n"
             "  default_backend_vision: 0"
         )
+
+
+@functools.lru_cache(maxsize=4)
+def get_backend_manager(config) -> BackendManager:
+    """Get the shared backend manager for a configuration object.
+    
+    Reusing the manager keeps backend instances (and their HTTP clients)
+    alive across calls that use the same configuration.
+    
+    Args:
+        config: Configuration object.
+        
+    Returns:
+        BackendManager: Backend manager for this configuration.
+    """
+    return BackendManager(config)
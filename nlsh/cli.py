@@ -4,27 +4,45 @@ Command-line interface for nlsh.
 This module provides the command-line interface for the nlsh utility.
 """
 
+from __future__ import annotations
+
 import argparse
-import asyncio
+import atexit
 import datetime
+import functools
 import json
 import locale
 import os
-import select
+import selectors
 import signal
 import subprocess
 import sys
 import traceback
-from typing import Any, List, Optional, Union, TextIO
-
-from nlsh.config import Config
-from nlsh.backends import BackendManager, LLMBackend
-from nlsh.config import Config
-from nlsh.backends import BackendManager, LLMBackend
-from nlsh.tools import get_tools
-from nlsh.prompt import PromptBuilder
+from typing import TYPE_CHECKING, Any, Coroutine, Dict, List, Optional, TypeVar, Union
+
 from nlsh.spinner import Spinner
 from nlsh.editor import edit_text_in_editor
+from nlsh.response_cache import get_cache_path, read_cached_response, write_cached_response
+
+# Config, backends, tools and prompts pull in yaml/openai, so they are
+# imported lazily where needed to keep --version and --help fast.
+if TYPE_CHECKING:
+    from nlsh.config import Config
+    from nlsh.backends import BackendManager, LLMBackend
+    from nlsh.prompt import PromptBuilder
+    from nlsh.tools.base import BaseTool
+
+T = TypeVar("T")
+
+
+# Size of raw reads from the command's stdout/stderr pipes
+READ_CHUNK_SIZE = 64 * 1024
+
+# Accepted answers for the confirmation prompts
+YES_RESPONSES = frozenset({"y", "yes"})
+REGENERATE_RESPONSES = frozenset({"r", "regenerate"})
+EDIT_RESPONSES = frozenset({"e", "edit"})
+EXPLAIN_RESPONSES = frozenset({"x", "explain"})
 
 
 def _check_stdin_input() -> Optional[tuple[bytes, str]]:
@@ -137,6 +155,20 @@ def parse_args(args: List[str]) -> argparse.Namespace:
         help="Explain already crafted command"
     )
 
+    # Exec-replace flag - run the confirmed command in place of nlsh
+    parser.add_argument(
+        "--exec-replace",
+        action="store_true",
+        help="Replace nlsh with the confirmed command (no output capture or fix prompt)"
+    )
+
+    # Bypass the command and explanation caches
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Don't reuse a cached command or explanation for an identical prompt (overrides command_cache_ttl and explain_cache_ttl)"
+    )
+
     # Prompt (positional argument)
     parser.add_argument(
         "prompt",
@@ -147,21 +179,63 @@ def parse_args(args: List[str]) -> argparse.Namespace:
     return parser.parse_args(args)
 
 
+async def _generate_with_spinner(
+    backend: LLMBackend,
+    user_prompt: str,
+    system_prompt: str,
+    spinner_message: str,
+    verbose: Union[bool, int] = False,
+    log_file: Optional[str] = None,
+    **generate_kwargs: Any,
+) -> str:
+    """Generate a response, showing a spinner unless in verbose mode, and log it.
+    
+    Args:
+        backend: Backend instance to use.
+        user_prompt: User prompt to send.
+        system_prompt: System prompt to send.
+        spinner_message: Message shown next to the spinner.
+        verbose: Verbosity mode; the spinner is only shown when it is falsy.
+        log_file: Optional path to log file.
+        **generate_kwargs: Extra arguments for LLMBackend.generate_response.
+        
+    Returns:
+        str: Generated response.
+    """
+    # Start spinner if not in verbose mode
+    spinner = None
+    if not verbose:
+        spinner = Spinner(spinner_message)
+        spinner.start()
+    
+    try:
+        response = await backend.generate_response(user_prompt, system_prompt, verbose=verbose, **generate_kwargs)
+        log(log_file, backend, system_prompt, user_prompt, response, backend.last_usage)
+        return response
+    finally:
+        if spinner: spinner.stop()
+
+
 async def generate_command(
-    config: Config, 
-    backend_index: Optional[int], 
+    backend: LLMBackend,
+    prompt_builder: PromptBuilder,
+    tools: List[BaseTool],
     prompt: str,
-    verbose: bool = False, 
+    verbose: Union[bool, int] = False, 
     log_file: Optional[str] = None,
+    cache_ttl: int = 0,
 ) -> str:
     """Generate a command using the specified backend.
     
     Args:
-        config: Configuration object.
-        backend_index: Backend index to use.
+        backend: Backend instance to use.
+        prompt_builder: Prompt builder instance.
+        tools: List of tool instances providing system context.
         prompt: User prompt.
-        verbose: Whether to print reasoning tokens to stderr.
+        verbose: Verbosity level; if truthy, reasoning tokens are printed to stderr.
         log_file: Optional path to log file.
+        cache_ttl: Seconds to reuse a command cached for the same prompts and
+            backend; 0 always asks the backend.
         
     Returns:
         str: Generated shell command.
@@ -169,50 +243,44 @@ async def generate_command(
     Raises:
         Exception: If command generation fails.
     """
-    # Get backend manager
-    backend_manager = BackendManager(config)
-    
-    # Get tools
-    tools = get_tools(config=config)
-    
     # Build prompt
-    prompt_builder = PromptBuilder(config)
-    system_prompt = prompt_builder.build_system_prompt(tools)
+    system_prompt = await prompt_builder.build_system_prompt(tools)
     
-    # Get backend
-    backend = backend_manager.get_backend(backend_index)
+    cache_path = None
+    if cache_ttl > 0:
+        cache_path = get_cache_path("commands", backend.url, backend.model, system_prompt, prompt)
+        cached = read_cached_response(cache_path, cache_ttl)
+        if cached:
+            print("Using cached command.", file=sys.stderr)
+            return cached
     
-    # Start spinner if not in verbose mode
-    spinner = None
-    if not verbose:
-        spinner = Spinner("Thinking")
-        spinner.start()
+    command = await _generate_with_spinner(
+        backend, prompt, system_prompt, "Thinking", verbose, log_file, regeneration_count=0
+    )
     
-    try:
-        # Generate command
-        response = await backend.generate_response(prompt, system_prompt, verbose=verbose, regeneration_count=0)
-        log(log_file, backend, system_prompt, prompt, response)
-        return response
-    finally:
-        if spinner: spinner.stop()
+    if cache_path:
+        write_cached_response(cache_path, command)
+    return command
 
 
 async def generate_command_regeneration(
-    config: Config,
-    backend_index: Optional[int],
+    backend: LLMBackend,
+    prompt_builder: PromptBuilder,
+    tools: List[BaseTool],
     original_request: str,
     declined_commands: List[dict],
-    verbose: bool = False,
+    verbose: Union[bool, int] = False,
     log_file: Optional[str] = None,
 ) -> str:
     """Generate a regenerated command using the specified backend.
     
     Args:
-        config: Configuration object.
-        backend_index: Backend index to use.
+        backend: Backend instance to use.
+        prompt_builder: Prompt builder instance.
+        tools: List of tool instances providing system context.
         original_request: Original user request.
         declined_commands: List of declined commands with optional notes.
-        verbose: Whether to print reasoning tokens to stderr.
+        verbose: Verbosity level; if truthy, reasoning tokens are printed to stderr.
         log_file: Optional path to log file.
         
     Returns:
@@ -221,56 +289,39 @@ async def generate_command_regeneration(
     Raises:
         Exception: If command generation fails.
     """
-    # Get backend manager
-    backend_manager = BackendManager(config)
-    
-    # Get tools
-    tools = get_tools(config=config)
-    
     # Build prompt
-    prompt_builder = PromptBuilder(config)
-    system_prompt = prompt_builder.build_regeneration_system_prompt(tools)
+    system_prompt = await prompt_builder.build_regeneration_system_prompt(tools)
     user_prompt = prompt_builder.build_regeneration_user_prompt(original_request, declined_commands)
     regeneration_count = len(declined_commands)
     
-    # Get backend
-    backend = backend_manager.get_backend(backend_index)
-    
-    # Start spinner if not in verbose mode
-    spinner = None
-    if not verbose:
-        spinner = Spinner("Regenerating")
-        spinner.start()
-    
-    try:
-        # Generate command
-        response = await backend.generate_response(user_prompt, system_prompt, verbose=verbose, regeneration_count=regeneration_count)
-        log(log_file, backend, system_prompt, user_prompt, response)
-        return response
-    finally:
-        if spinner: spinner.stop()
+    return await _generate_with_spinner(
+        backend, user_prompt, system_prompt, "Regenerating", verbose, log_file,
+        regeneration_count=regeneration_count
+    )
 
 
 async def generate_command_fix(
-    config: Config, 
-    backend_index: Optional[int], 
+    backend: LLMBackend,
+    prompt_builder: PromptBuilder,
+    tools: List[BaseTool],
     prompt: str,
     failed_command: str,
     failed_command_exit_code: int,
     failed_command_output: str,
-    verbose: bool = False, 
+    verbose: Union[bool, int] = False, 
     log_file: Optional[str] = None,
 ) -> str:
     """Generate a fix for failed command using the specified backend.
     
     Args:
-        config: Configuration object.
-        backend_index: Backend index to use.
+        backend: Backend instance to use.
+        prompt_builder: Prompt builder instance.
+        tools: List of tool instances providing system context.
         prompt: User prompt.
         failed_command: Failed command.
         failed_command_exit_code: Exit code of the failed command.
         failed_command_output: Output of the failed command.
-        verbose: Whether to print reasoning tokens to stderr.
+        verbose: Verbosity level; if truthy, reasoning tokens are printed to stderr.
         log_file: Optional path to log file.
         
     Returns:
@@ -279,15 +330,8 @@ async def generate_command_fix(
     Raises:
         Exception: If command generation fails.
     """
-    # Get backend manager
-    backend_manager = BackendManager(config)
-    
-    # Get tools
-    tools = get_tools(config=config)
-    
     # Build prompt
-    prompt_builder = PromptBuilder(config)
-    system_prompt = prompt_builder.build_fixing_system_prompt(tools)
+    system_prompt = await prompt_builder.build_fixing_system_prompt(tools)
     user_prompt = prompt_builder.build_fixing_user_prompt(
         prompt,
         failed_command, 
@@ -295,31 +339,19 @@ async def generate_command_fix(
         failed_command_output,
     )
 
-    # Get backend
-    backend = backend_manager.get_backend(backend_index)
-    
-    # Start spinner if not in verbose mode
-    spinner = None
-    if not verbose:
-        spinner = Spinner("Fixing")
-        spinner.start()
-    
-    try:
-        # Generate command
-        response = await backend.generate_response(user_prompt, system_prompt, verbose=verbose)
-        log(log_file, backend, system_prompt, user_prompt, response)
-        return response
-    finally:
-        if spinner: spinner.stop()
+    return await _generate_with_spinner(
+        backend, user_prompt, system_prompt, "Fixing", verbose, log_file
+    )
 
 
 async def process_stdin_input(
     config: Config,
+    prompt_builder: PromptBuilder,
     backend_index: Optional[int],
     stdin_data: bytes,
     mime_type: str,
     user_prompt: str,
-    verbose: bool = False,
+    verbose: Union[bool, int] = False,
     log_file: Optional[str] = None,
     max_tokens_override: Optional[int] = None,
 ) -> str:
@@ -327,11 +359,12 @@ async def process_stdin_input(
     
     Args:
         config: Configuration object.
+        prompt_builder: Prompt builder instance.
         backend_index: Backend index to use.
         stdin_data: Raw data read from STDIN.
         mime_type: MIME type of the input data.
         user_prompt: User's instruction for processing the content.
-        verbose: Whether to print reasoning tokens to stderr.
+        verbose: Verbosity level; if truthy, reasoning tokens are printed to stderr.
         log_file: Optional path to log file.
         
     Returns:
@@ -342,12 +375,12 @@ async def process_stdin_input(
     """
     # Import here to avoid circular imports
     from nlsh.image_utils import is_image_type, validate_image_size, get_backend_image_size_limit
+    from nlsh.backends import get_backend_manager
     
     # Get backend manager
-    backend_manager = BackendManager(config)
+    backend_manager = get_backend_manager(config)
     
     # Build prompt (no system tools needed for STDIN processing)
-    prompt_builder = PromptBuilder(config)
     system_prompt = prompt_builder.build_stdin_processing_system_prompt()
     
     # Get max tokens from config or override
@@ -379,27 +412,19 @@ async def process_stdin_input(
             max_image_size = get_backend_image_size_limit(backend_config)
             validate_image_size(stdin_data, max_image_size)
             
-            # Start spinner if not in verbose mode
-            spinner = None
-            if not verbose:
-                spinner = Spinner("Processing image")
-                spinner.start()
-            
-            try:
-                # Process image input
-                response = await backend.generate_response(
-                    user_prompt,
-                    system_prompt,
-                    verbose=verbose,
-                    strip_markdown=False,  # Don't strip markdown for image processing
-                    max_tokens=max_tokens,
-                    image_data=stdin_data,
-                    image_mime_type=mime_type
-                )
-                log(log_file, backend, system_prompt, user_prompt, response)
-                return response
-            finally:
-                if spinner: spinner.stop()
+            # Process image input
+            return await _generate_with_spinner(
+                backend,
+                user_prompt,
+                system_prompt,
+                "Processing image",
+                verbose,
+                log_file,
+                strip_markdown=False,  # Don't strip markdown for image processing
+                max_tokens=max_tokens,
+                image_data=stdin_data,
+                image_mime_type=mime_type
+            )
                 
         except Exception as e:
             raise Exception(f"Error processing image: {str(e)}")
@@ -419,42 +444,39 @@ async def process_stdin_input(
         # Get backend
         backend = backend_manager.get_backend(backend_index)
         
-        # Start spinner if not in verbose mode
-        spinner = None
-        if not verbose:
-            spinner = Spinner("Processing text")
-            spinner.start()
-        
-        try:
-            # Process text input
-            response = await backend.generate_response(
-                user_prompt_formatted,
-                system_prompt,
-                verbose=verbose,
-                strip_markdown=False,  # Don't strip markdown for text processing
-                max_tokens=max_tokens
-            )
-            log(log_file, backend, system_prompt, user_prompt_formatted, response)
-            return response
-        finally:
-            if spinner: spinner.stop()
+        # Process text input
+        return await _generate_with_spinner(
+            backend,
+            user_prompt_formatted,
+            system_prompt,
+            "Processing text",
+            verbose,
+            log_file,
+            strip_markdown=False,  # Don't strip markdown for text processing
+            max_tokens=max_tokens
+        )
 
 
 async def explain_command(
-    config: Config,
-    backend_index: Optional[int],
+    backend: LLMBackend,
+    prompt_builder: PromptBuilder,
+    tools: List[BaseTool],
     command: str,
     verbose: int,
-    log_file: Optional[str] = None
+    log_file: Optional[str] = None,
+    cache_ttl: int = 0,
 ) -> str:
     """Generate an explanation for a shell command.
     
     Args:
-        config: Configuration object.
-        backend_index: Backend index to use.
+        backend: Backend instance to use.
+        prompt_builder: Prompt builder instance.
+        tools: List of tool instances providing system context.
         command: Shell command to explain.
         verbose: Verbosity mode.
         log_file: Optional path to log file.
+        cache_ttl: Seconds to reuse an explanation cached for the same prompts
+            and backend; 0 always asks the backend.
         
     Returns:
         str: Generated explanation.
@@ -462,32 +484,38 @@ async def explain_command(
     Raises:
         Exception: If explanation generation fails.
     """
-    # Get backend manager
-    backend_manager = BackendManager(config)
-    
-    # Get tools
-    tools = get_tools(config=config)
-    
     # Build prompt
-    prompt_builder = PromptBuilder(config)
-    system_prompt = prompt_builder.build_explanation_system_prompt(tools)
+    system_prompt = await prompt_builder.build_explanation_system_prompt(tools)
     
-    # Get backend
-    backend = backend_manager.get_backend(backend_index)
+    cache_path = None
+    if cache_ttl > 0:
+        cache_path = get_cache_path("explanations", backend.url, backend.model, system_prompt, command)
+        cached = read_cached_response(cache_path, cache_ttl)
+        if cached:
+            return cached
     
-    # Start spinner if not in verbose mode
-    spinner = None
-    if verbose == 0:
-        spinner = Spinner("Explaining")
-        spinner.start()
+    explanation = await _generate_with_spinner(
+        backend, command, system_prompt, "Explaining", verbose, log_file,
+        strip_markdown=False, max_tokens=1000
+    )
     
-    try:
-        # Generate explanation
-        explanation = await backend.generate_response(command, system_prompt, verbose=verbose, strip_markdown=False, max_tokens=1000)
-        log(log_file, backend, system_prompt, command, explanation)
-        return explanation
-    finally:
-        if spinner: spinner.stop()
+    if cache_path:
+        write_cached_response(cache_path, explanation)
+    return explanation
+
+
+def _read_response(prompt: str) -> str:
+    """Write a prompt to stdout and read one line of user input.
+    
+    Args:
+        prompt: Prompt text to display.
+        
+    Returns:
+        str: Stripped response, or an empty string on EOF.
+    """
+    sys.stdout.write(prompt)
+    sys.stdout.flush()
+    return sys.stdin.readline().strip()
 
 
 def confirm_execution(command: str) -> Union[bool, str, tuple]:
@@ -502,17 +530,17 @@ def confirm_execution(command: str) -> Union[bool, str, tuple]:
                                For regeneration, returns tuple ("regenerate", note) where note can be None.
     """
     print(f"Suggested: {command}")
-    response = input("[Confirm] Run this command? (y/N/e/r/x) ").strip().lower()
+    response = _read_response("[Confirm] Run this command? (y/N/e/r/x) ").lower()
     
-    if response in ["r", "regenerate"]:
-        note = input("Note for regeneration (optional): ").strip()
+    if response in REGENERATE_RESPONSES:
+        note = _read_response("Note for regeneration (optional): ")
         return ("regenerate", note if note else None)
-    elif response in ["e", "edit"]:
+    elif response in EDIT_RESPONSES:
         return "edit"
-    elif response in ["x", "explain"]:
+    elif response in EXPLAIN_RESPONSES:
         return "explain"
     
-    return response in ["y", "yes"]
+    return response in YES_RESPONSES
 
 
 def confirm_fix(command: str, code: int) -> bool:
@@ -529,37 +557,68 @@ def confirm_fix(command: str, code: int) -> bool:
     print(f"Command execution failed with code {code}")
     print(f"Failed command: {command}")
     print("Try to fix? If you confirm, the command output and exit code will be sent to LLM.")
-    response = input("[Confirm] Try to fix this command? (y/N) ").strip().lower()
+    response = _read_response("[Confirm] Try to fix this command? (y/N) ").lower()
 
-    return response in ["y", "yes"]
+    return response in YES_RESPONSES
 
 
-def handle_keyboard_interrupt(signum: int, frame: Any) -> None:
-    """Handle keyboard interrupt (Ctrl+C)."""
-    print("\nOperation cancelled by user", file=sys.stderr)
-    sys.exit(130)  # 128 + SIGINT
+_event_loop = None
 
 
-def safe_write(stream: TextIO, text: str) -> None:
-    """Safely write text to a stream, handling encoding errors.
+def run_async(coro: Coroutine[Any, Any, T]) -> T:
+    """Run a coroutine to completion on the shared event loop.
+    
+    A lighter alternative to asyncio.run() for the single-request coroutines
+    used by the CLI. The loop is created on first use and reused by later
+    calls, because the backends' async HTTP clients are bound to the loop
+    they first ran on.
     
     Args:
-        stream: Output stream (stdout/stderr).
-        text: Text to write.
+        coro: Coroutine to run.
+        
+    Returns:
+        The coroutine's result.
     """
-    try:
-        stream.write(text)
-        stream.flush()
-    except UnicodeEncodeError:
-        # Fall back to ascii with replacement characters
-        stream.write(text.encode(stream.encoding or 'ascii', 'replace').decode())
-        stream.flush()
+    global _event_loop
+    
+    if _event_loop is None:
+        try:
+            # uvloop is optional; it lowers event loop overhead on Linux/macOS
+            import uvloop
+            _event_loop = uvloop.new_event_loop()
+        except ImportError:
+            import asyncio
+            _event_loop = asyncio.new_event_loop()
+        atexit.register(_close_event_loop)
+    
+    return _event_loop.run_until_complete(coro)
+
+
+def _close_event_loop() -> None:
+    """Finalize pending async generators and close the shared event loop."""
+    global _event_loop
+    
+    if _event_loop is not None and not _event_loop.is_closed():
+        try:
+            _event_loop.run_until_complete(_event_loop.shutdown_asyncgens())
+        finally:
+            _event_loop.close()
+    _event_loop = None
+
+
+def handle_keyboard_interrupt(signum: int, frame: Any) -> None:
+    """Handle keyboard interrupt (Ctrl+C)."""
+    print("\nOperation cancelled by user", file=sys.stderr)
+    sys.exit(130)  # 128 + SIGINT
 
 
 def execute_command(command: str) -> tuple[int, str]:
     """Execute a shell command safely."""
-    output = ""
+    chunks = []
     process = None
+    
+    # Captured output is decoded the same way however the command ends
+    system_encoding = locale.getpreferredencoding()
 
     try:
         shell = os.environ.get("SHELL", "/bin/sh")
@@ -567,9 +626,6 @@ def execute_command(command: str) -> tuple[int, str]:
         # Set up signal handler for Ctrl+C
         signal.signal(signal.SIGINT, handle_keyboard_interrupt)
         
-        # Get system encoding
-        system_encoding = locale.getpreferredencoding()
-        
         # Security Note: Using shell=True can be risky if the command is crafted maliciously.
         # User confirmation (confirm_execution) is the primary safeguard.
         process = subprocess.Popen(
@@ -578,44 +634,54 @@ def execute_command(command: str) -> tuple[int, str]:
             executable=shell,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
-            bufsize=0,  # Unbuffered
-            encoding=system_encoding,
-            errors='replace'  # Replace invalid characters
+            bufsize=0,  # Unbuffered, raw bytes
         )
         
-        # Use select for non-blocking I/O
+        # Make sure everything printed so far is visible before raw fd writes
+        sys.stdout.flush()
+        sys.stderr.flush()
+        
+        # Forward raw chunks from the pipes to our own fds through 64 KiB
+        # buffers, bypassing the text layer. Buffers are flushed whenever
+        # the pipes go idle, so bursts of small writes are coalesced while
+        # output still appears live, and before switching to the other
+        # stream, so stdout and stderr stay interleaved in order.
         stdout_fd = process.stdout.fileno()
         stderr_fd = process.stderr.fileno()
         
-        readable_fds = [stdout_fd, stderr_fd]
-        stdout_data, stderr_data = "", ""
-        
-        while readable_fds:
-            # Use select to wait for data to be available
-            ready_to_read, _, _ = select.select(readable_fds, [], [], 0.1)
+        with selectors.DefaultSelector() as selector, \
+                open(sys.stdout.fileno(), "wb", buffering=READ_CHUNK_SIZE, closefd=False) as out, \
+                open(sys.stderr.fileno(), "wb", buffering=READ_CHUNK_SIZE, closefd=False) as err:
+            selector.register(stdout_fd, selectors.EVENT_READ, out)
+            selector.register(stderr_fd, selectors.EVENT_READ, err)
             
-            # Process has exited and no more data to read
-            if not ready_to_read and process.poll() is not None:
-                break
+            timeout = None
+            last_writer = None
+            while selector.get_map():
+                events = selector.select(timeout)
+                if not events:
+                    # Nothing more to read right now, show what we have
+                    out.flush()
+                    err.flush()
+                    timeout = None
+                    continue
                 
-            for fd in ready_to_read:
-                if fd == stdout_fd:
-                    data = process.stdout.read(1024)
-                    if not data:  # EOF
-                        readable_fds.remove(stdout_fd)
-                    else:
-                        safe_write(sys.stdout, data)
-                        stdout_data += data
-                        output += data
-                        
-                elif fd == stderr_fd:
-                    data = process.stderr.read(1024)
+                for key, _ in events:
+                    data = os.read(key.fd, READ_CHUNK_SIZE)
                     if not data:  # EOF
-                        readable_fds.remove(stderr_fd)
-                    else:
-                        safe_write(sys.stderr, data)
-                        stderr_data += data
-                        output += data
+                        selector.unregister(key.fd)
+                        continue
+                    if last_writer is not key.data:
+                        if last_writer is not None:
+                            last_writer.flush()
+                        last_writer = key.data
+                    key.data.write(data)
+                    chunks.append(data)
+                
+                # Keep draining without blocking until the pipes are idle
+                timeout = 0
+        
+        output = b"".join(chunks).decode(system_encoding, errors='replace')
         
         # Wait for process to complete and get exit code
         return process.wait(), output
@@ -628,13 +694,69 @@ def execute_command(command: str) -> tuple[int, str]:
             except subprocess.TimeoutExpired:
                 process.kill()
         print("\nCommand interrupted", file=sys.stderr)
-        return 130
+        return 130, b"".join(chunks).decode(system_encoding, errors='replace')
     except Exception as e:
+        print(f"Error executing command: {str(e)}", file=sys.stderr)
+        return 1, b"".join(chunks).decode(system_encoding, errors='replace')
+
+
+def exec_command(command: str) -> int:
+    """Replace the current process with the shell running a command.
+    
+    Used when running the command is the final action, so no pipes, output
+    pump or Python shutdown are needed. Only returns if exec fails.
+    
+    Args:
+        command: Command to execute.
+        
+    Returns:
+        int: Exit code (only on failure).
+    """
+    shell = os.environ.get("SHELL", "/bin/sh")
+    
+    # Flush pending output, exec does not return to run atexit handlers
+    sys.stdout.flush()
+    sys.stderr.flush()
+    
+    try:
+        os.execvp(shell, [shell, "-c", command])
+    except OSError as e:
         print(f"Error executing command: {str(e)}", file=sys.stderr)
         return 1
 
 
-def log(log_file: str, backend: LLMBackend, system_prompt: str, prompt: str, response: str):
+@functools.lru_cache(maxsize=None)
+def _open_log_file(log_file: str):
+    """Open a log file for appending once per process, creating its directory.
+    
+    The handle stays open for the life of the process and is closed by the
+    interpreter at exit.
+    """
+    log_dir = os.path.dirname(log_file)
+    if log_dir:
+        os.makedirs(log_dir, exist_ok=True)
+    return open(log_file, 'ab')
+
+
+@functools.lru_cache(maxsize=None)
+def _log_entry_encoder():
+    """Return a function encoding a log entry as one compact UTF-8 JSON line."""
+    try:
+        # orjson is optional; it serializes large prompts several times faster
+        import orjson
+    except ImportError:
+        return lambda entry: json.dumps(entry, separators=(",", ":")).encode("utf-8") + b"\n"
+    return lambda entry: orjson.dumps(entry, option=orjson.OPT_APPEND_NEWLINE)
+
+
+def log(
+    log_file: str,
+    backend: LLMBackend,
+    system_prompt: str,
+    prompt: str,
+    response: str,
+    usage: Optional[Dict[str, int]] = None,
+):
     if not log_file:
         return
     
@@ -649,16 +771,15 @@ def log(log_file: str, backend: LLMBackend, system_prompt: str, prompt: str, res
         "system_context": system_prompt,
         "response": response
     }
+    if usage:
+        log_entry["usage"] = usage
 
     try:
-        # Create directory if it doesn't exist
-        log_dir = os.path.dirname(log_file)
-        if log_dir and not os.path.exists(log_dir):
-            os.makedirs(log_dir)
-        
-        # Append to log file
-        with open(log_file, 'a') as f:
-            f.write(json.dumps(log_entry, indent=2) + "\n")
+        # Append one compact JSON line per entry (JSONL), flushed right away so
+        # entries survive exec-replace and crashes
+        f = _open_log_file(log_file)
+        f.write(_log_entry_encoder()(log_entry))
+        f.flush()
     except Exception as e:
         print(f"Error writing to log file: {str(e)}", file=sys.stderr)
 
@@ -688,24 +809,43 @@ def _handle_edit_command(command: str) -> tuple[str, bool]:
     return edited_command, True
 
 
-def _handle_explain_command(config: Config, args: argparse.Namespace, command: str) -> bool:
+def _handle_explain_command(
+    backend_manager: BackendManager,
+    explain_backend_index: Optional[int],
+    prompt_builder: PromptBuilder,
+    tools: List[BaseTool],
+    args: argparse.Namespace,
+    command: str,
+    cache_ttl: int = 0,
+) -> bool:
     """Handle explaining a command.
     
+    The explanation backend is only created here, on first use, so a
+    misconfigured explain_backend does not affect sessions that never ask
+    for an explanation.
+    
     Args:
-        config: Configuration object.
+        backend_manager: Backend manager to get the explanation backend from.
+        explain_backend_index: Index of the explanation backend, or None for
+            the default backend.
+        prompt_builder: Prompt builder instance.
+        tools: List of tool instances providing system context.
         args: Command-line arguments.
         command: Command to explain.
+        cache_ttl: Seconds to reuse a cached explanation; 0 disables the cache.
         
     Returns:
         bool: Whether to continue with confirmation.
     """
     try:
-        explanation = asyncio.run(explain_command(
-            config,
-            args.backend,
+        explanation = run_async(explain_command(
+            backend_manager.get_backend(explain_backend_index),
+            prompt_builder,
+            tools,
             command,
             verbose=args.verbose,
             log_file=args.log_file,
+            cache_ttl=cache_ttl,
         ))
         print("\nExplanation:")
         print("-" * 40)
@@ -719,14 +859,29 @@ def _handle_explain_command(config: Config, args: argparse.Namespace, command: s
         return True
 
 
-def _process_command_confirmation(config: Config, args: argparse.Namespace, command: str, declined_commands: List[dict]) -> tuple[int, bool, dict]:
+def _process_command_confirmation(
+    backend_manager: BackendManager,
+    explain_backend_index: Optional[int],
+    prompt_builder: PromptBuilder,
+    tools: List[BaseTool],
+    args: argparse.Namespace,
+    command: str,
+    declined_commands: List[dict],
+    explain_cache_ttl: int = 0,
+) -> tuple[int, bool, dict]:
     """Process command confirmation and execution.
     
     Args:
-        config: Configuration object.
+        backend_manager: Backend manager to get the explanation backend from.
+        explain_backend_index: Index of the explanation backend, or None for
+            the default backend.
+        prompt_builder: Prompt builder instance.
+        tools: List of tool instances providing system context.
         args: Command-line arguments.
         command: Command to confirm and execute.
         declined_commands: List of declined commands with optional notes.
+        explain_cache_ttl: Seconds to reuse a cached explanation; 0 disables
+            the cache.
         
     Returns:
         tuple: (exit_code, should_continue, fix_info)
@@ -754,11 +909,18 @@ def _process_command_confirmation(config: Config, args: argparse.Namespace, comm
             if should_continue:
                 continue
         elif confirmation == "explain":
-            should_continue = _handle_explain_command(config, args, command)
+            should_continue = _handle_explain_command(
+                backend_manager, explain_backend_index, prompt_builder, tools, args, command,
+                cache_ttl=explain_cache_ttl,
+            )
             if should_continue:
                 continue
         elif confirmation:
             print(f"Executing: {command}")
+            if args.exec_replace:
+                # Nothing to capture, hand the process over to the command
+                return exec_command(command), True, fix_info
+            
             # Actually execute the command
             code, output = execute_command(command)
             if code == 0:
@@ -781,18 +943,17 @@ def _process_command_confirmation(config: Config, args: argparse.Namespace, comm
             return 0, True, fix_info
 
 
-def _get_prompt(args: argparse.Namespace, config: Config) -> str:
+def _get_prompt(args: argparse.Namespace, prompt_builder: PromptBuilder) -> str:
     """Get prompt from file or command line.
     
     Args:
         args: Command-line arguments.
-        config: Configuration object.
+        prompt_builder: Prompt builder instance.
         
     Returns:
         str: Prompt.
     """
     if args.prompt_file:
-        prompt_builder = PromptBuilder(config)
         return prompt_builder.load_prompt_from_file(args.prompt_file)
     else:
         # Join all prompt arguments into a single string
@@ -812,26 +973,33 @@ def main() -> int:
         # Parse arguments
         args = parse_args(sys.argv[1:])
         
-        # Handle --init flag
-        if args.init:
-            Config.create_default_config()
-            return 0
-        
         # Show version and exit
         if args.version:
             from nlsh import __version__
             print(f"nlsh version {__version__}")
             return 0
         
+        from nlsh.config import Config
+        from nlsh.prompt import PromptBuilder
+        
+        # Handle --init flag
+        if args.init:
+            Config.create_default_config()
+            return 0
+        
         # Load configuration
         config = Config(args.config)
         
         # Notify if no config file was found
         if not config.config_file_found:
-            print("Note: No configuration file found at default locations.", file=sys.stderr)
-            print("Using default configuration. Run 'nlsh --init' to create a config file.", file=sys.stderr)
+            sys.stderr.write(
+                "Note: No configuration file found at default locations.\n"
+                "Using default configuration. Run 'nlsh --init' to create a config file.\n"
+            )
             print()
 
+        prompt_builder = PromptBuilder(config)
+
         # Validate mutually exclusive flags
         if args.print and args.explain:
             print("Error: --print and --explain flags cannot be used together", file=sys.stderr)
@@ -851,20 +1019,21 @@ def main() -> int:
                 return 1
             
             # Get prompt from file or command line
-            prompt = _get_prompt(args, config)
+            prompt = _get_prompt(args, prompt_builder)
             
             # Unpack stdin data and mime type
             stdin_data, mime_type = stdin_input
             
             try:
                 # Process STDIN input
-                result = asyncio.run(process_stdin_input(
+                result = run_async(process_stdin_input(
                     config,
+                    prompt_builder,
                     args.backend,
                     stdin_data,
                     mime_type,
                     prompt,
-                    verbose=args.verbose > 0,
+                    verbose=args.verbose,
                     log_file=args.log_file,
                     max_tokens_override=args.max_tokens,
                 ))
@@ -886,17 +1055,45 @@ def main() -> int:
             return 1
 
         # Get prompt from file or command line
-        prompt = _get_prompt(args, config)
+        prompt = _get_prompt(args, prompt_builder)
+        
+        # Backend and tools are shared by all generation calls below. Tool
+        # context is gathered in the background while the backend libraries
+        # are imported.
+        from nlsh.tools import get_tools
+        
+        tools = get_tools(config=config)
+        prompt_builder.prefetch_tools_context(tools)
+        
+        from nlsh.backends import get_backend_manager
+        
+        backend_manager = get_backend_manager(config)
+        
+        # Explanations may use a separate, smaller backend unless one was
+        # chosen explicitly on the command line
+        if args.backend is not None:
+            explain_backend_index = args.backend
+        else:
+            explain_backend_index = config.get_explain_backend()
+        
+        # Use the configured cache lifetimes unless --no-cache was given
+        if args.no_cache:
+            explain_cache_ttl = command_cache_ttl = 0
+        else:
+            explain_cache_ttl = config.get_explain_cache_ttl()
+            command_cache_ttl = config.get_command_cache_ttl()
         
         # Handle explain mode
         if args.explain:
             try:
-                explanation = asyncio.run(explain_command(
-                    config,
-                    args.backend,
+                explanation = run_async(explain_command(
+                    backend_manager.get_backend(explain_backend_index),
+                    prompt_builder,
+                    tools,
                     prompt,
                     verbose=args.verbose,
                     log_file=args.log_file,
+                    cache_ttl=explain_cache_ttl,
                 ))
                 print(explanation)
                 return 0
@@ -906,15 +1103,19 @@ def main() -> int:
                     traceback.print_exc(file=sys.stderr)
                 return 1
         
+        backend = backend_manager.get_backend(args.backend)
+        
         # Handle print mode
         if args.print:
             try:
-                command = asyncio.run(generate_command(
-                    config,
-                    args.backend,
+                command = run_async(generate_command(
+                    backend,
+                    prompt_builder,
+                    tools,
                     prompt,
-                    verbose=args.verbose > 0,
+                    verbose=args.verbose,
                     log_file=args.log_file,
+                    cache_ttl=command_cache_ttl,
                 ))
                 print(command)
                 return 0
@@ -938,39 +1139,44 @@ def main() -> int:
             try:
                 # Generate, fix, or regenerate command
                 if fix_info["fix_command"]:
-                    command = asyncio.run(generate_command_fix(
-                        config,
-                        args.backend,
+                    command = run_async(generate_command_fix(
+                        backend,
+                        prompt_builder,
+                        tools,
                         prompt,
                         fix_info["failed_command"],
                         fix_info["failed_command_exit_code"],
                         fix_info["failed_command_output"],
-                        verbose=args.verbose > 0,
+                        verbose=args.verbose,
                         log_file=args.log_file,
                     ))
                 elif fix_info["regenerate"] or declined_commands:
                     # Use regeneration logic if we have declined commands or explicit regeneration request
-                    command = asyncio.run(generate_command_regeneration(
-                        config,
-                        args.backend,
+                    command = run_async(generate_command_regeneration(
+                        backend,
+                        prompt_builder,
+                        tools,
                         prompt,
                         declined_commands,
-                        verbose=args.verbose > 0,
+                        verbose=args.verbose,
                         log_file=args.log_file,
                     ))
                 else:
                     # Initial command generation
-                    command = asyncio.run(generate_command(
-                        config,
-                        args.backend,
+                    command = run_async(generate_command(
+                        backend,
+                        prompt_builder,
+                        tools,
                         prompt,
-                        verbose=args.verbose > 0,
+                        verbose=args.verbose,
                         log_file=args.log_file,
+                        cache_ttl=command_cache_ttl,
                     ))
                 
                 # Process command confirmation and execution
                 exit_code, should_exit, fix_info = _process_command_confirmation(
-                    config, args, command, declined_commands
+                    backend_manager, explain_backend_index, prompt_builder, tools, args, command,
+                    declined_commands, explain_cache_ttl=explain_cache_ttl,
                 )
                 
                 if should_exit:
@@ -991,10 +1197,12 @@ def main() -> int:
         if args.verbose > 1:  # Show stack trace in double verbose mode
             traceback.print_exc(file=sys.stderr)
         if "API key" in str(e) or "Authentication failed" in str(e):
-            print("\nTroubleshooting tips:", file=sys.stderr)
-            print("1. Check that your API key is correctly set in the environment variable", file=sys.stderr)
-            print("2. Verify the API key is valid with your provider", file=sys.stderr)
-            print("3. Check the backend URL is correct in your configuration", file=sys.stderr)
+            sys.stderr.write(
+                "\nTroubleshooting tips:\n"
+                "1. Check that your API key is correctly set in the environment variable\n"
+                "2. Verify the API key is valid with your provider\n"
+                "3. Check the backend URL is correct in your configuration\n"
+            )
         return 1
     except KeyboardInterrupt:
         print("\nOperation cancelled by user", file=sys.stderr)
@@ -4,10 +4,31 @@ Configuration handling for nlsh.
 This module provides functionality for loading and managing configuration.
 """
 
+import functools
+import json
 import os
+import re
 from pathlib import Path
-from typing import Dict, List, Optional, Any
-import yaml
+from typing import IO, Dict, List, Mapping, Optional, Any
+
+# Matches a "$VAR" environment variable reference in a config value
+_ENV_REF = re.compile(r"^\$([A-Za-z_][A-Za-z0-9_]*)$")
+
+# Default configuration file locations, in lookup order.
+# A config.json next to config.yml is used when no YAML file exists.
+_DEFAULT_CONFIG_PATHS = (
+    Path.home() / ".nlsh" / "config.yml",
+    Path.home() / ".nlsh" / "config.json",
+    Path.home() / ".config" / "nlsh" / "config.yml",
+    Path.home() / ".config" / "nlsh" / "config.json",
+)
+
+# Shells nlsh can generate commands for
+_SUPPORTED_SHELLS = frozenset({"bash", "zsh", "fish", "powershell"})
+
+# Accepted spellings of boolean environment variable values
+_TRUE_ENV_VALUES = frozenset({"true", "1", "yes"})
+_FALSE_ENV_VALUES = frozenset({"false", "0", "no"})
 
 
 class ConfigValidationError(Exception):
@@ -15,6 +36,74 @@ class ConfigValidationError(Exception):
     pass
 
 
+def _load_yaml(stream: IO[str]) -> Any:
+    """Parse YAML, preferring the libyaml-backed loader when available.
+    
+    PyYAML is imported here so that JSON configs never pay its import cost.
+    
+    Args:
+        stream: Text stream to parse.
+        
+    Returns:
+        Parsed YAML content.
+    """
+    import yaml
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    return yaml.load(stream, Loader=loader)
+
+
+def _load_json(stream: IO[bytes]) -> Any:
+    """Parse JSON, preferring orjson when it is installed.
+    
+    Args:
+        stream: Binary stream to parse.
+        
+    Returns:
+        Parsed JSON content.
+    """
+    try:
+        # orjson is optional; its errors subclass json.JSONDecodeError
+        import orjson
+    except ImportError:
+        return json.load(stream)
+    return orjson.loads(stream.read())
+
+
+@functools.lru_cache(maxsize=8)
+def _parse_config_file(path: str, mtime_ns: int) -> Any:
+    """Parse a YAML or JSON config file, cached by path and modification time.
+    
+    Args:
+        path: Path to the config file. Files ending in .json are parsed as JSON.
+        mtime_ns: Modification time of the file, used as part of the cache key.
+        
+    Returns:
+        Parsed file content. Callers must not mutate it.
+    """
+    if path.endswith(".json"):
+        with open(path, 'rb') as f:
+            return _load_json(f)
+    with open(path, 'r') as f:
+        return _load_yaml(f)
+
+
+@functools.lru_cache(maxsize=8)
+def _resolve_config_file(config_path: Optional[str] = None) -> Optional[Path]:
+    """Resolve the configuration file to use, cached per explicit path.
+    
+    Args:
+        config_path: Optional explicit path to configuration file.
+        
+    Returns:
+        Path object to configuration file, or None if not found.
+    """
+    if config_path:
+        path = Path(config_path)
+        return path if path.exists() else None
+    
+    return next((path for path in _DEFAULT_CONFIG_PATHS if path.exists()), None)
+
+
 class Config:
     """Configuration manager for nlsh."""
     
@@ -34,6 +123,9 @@ class Config:
             }
         ],
         "default_backend": 0,
+        "command_cache_ttl": 0,  # Seconds to reuse a cached command for an identical prompt and context (0 disables)
+        "explain_cache_ttl": 3600,  # Seconds to reuse a cached explanation for an identical prompt (0 disables)
+        "explain_backend": None,  # Optional backend for command explanations (falls back to default_backend)
         "stdin": {
             "default_backend": None,  # Optional backend for text STDIN processing
             "default_backend_vision": None,  # Optional backend for image STDIN processing
@@ -42,7 +134,8 @@ class Config:
         "nlgc": {
             "include_full_files": True,  # Whether nlgc includes full file content by default
             "language": None,  # Language for commit message generation (e.g., "Spanish", "French")
-            "default_backend": None  # Optional backend for nlgc (falls back to global default)
+            "default_backend": None,  # Optional backend for nlgc (falls back to global default)
+            "cache_ttl": 86400  # Seconds to reuse a cached message for an identical prompt (0 disables)
         }
     }
     
@@ -53,7 +146,9 @@ class Config:
             config_path: Optional path to configuration file.
                 If not provided, will look in default locations.
         """
-        self.config = self.DEFAULT_CONFIG.copy()
+        # Shallow copy: nested values are replaced on write, never mutated,
+        # so DEFAULT_CONFIG and cached file contents stay untouched
+        self.config = dict(self.DEFAULT_CONFIG)
         self.config_file_found = False  # Track if config file was found
         self.config_file_path = None    # Store the path that was found or would be used
         
@@ -92,25 +187,7 @@ class Config:
         Returns:
             Path object to configuration file, or None if not found.
         """
-        if config_path:
-            path = Path(config_path)
-            if path.exists():
-                return path
-            return None
-            
-        # Check default locations
-        # 1. ~/.nlsh/config.yml
-        home_config = Path.home() / ".nlsh" / "config.yml"
-        if home_config.exists():
-            return home_config
-            
-        # 2. ~/.config/nlsh/config.yml
-        xdg_config = Path.home() / ".config" / "nlsh" / "config.yml"
-        if xdg_config.exists():
-            return xdg_config
-            
-        # No config file found
-        return None
+        return _resolve_config_file(config_path)
     
     def _validate_config(self, config: Dict[str, Any]) -> None:
         """Validate configuration structure and values.
@@ -124,7 +201,7 @@ class Config:
         # Validate shell
         if not isinstance(config.get("shell"), str):
             raise ConfigValidationError("Shell must be a string")
-        if config["shell"] not in ["bash", "zsh", "fish", "powershell"]:
+        if config["shell"] not in _SUPPORTED_SHELLS:
             raise ConfigValidationError("Shell must be one of: bash, zsh, fish, powershell")
             
         # Validate backends
@@ -143,8 +220,9 @@ class Config:
             
             # Validate API key format and environment variables
             if "api_key" in backend and isinstance(backend["api_key"], str):
-                if backend["api_key"].startswith("$"):
-                    env_var = backend["api_key"][1:]
+                env_ref = _ENV_REF.match(backend["api_key"])
+                if env_ref:
+                    env_var = env_ref.group(1)
                     api_key = os.environ.get(env_var)
                     if not api_key:
                         raise ConfigValidationError(
@@ -154,6 +232,12 @@ class Config:
                         raise ConfigValidationError(
                             f"API key from environment variable {env_var} for backend {backend['name']} appears invalid (too short)"
                         )
+                elif backend["api_key"].startswith("$"):
+                    # Reject malformed references rather than sending them as the key
+                    raise ConfigValidationError(
+                        f"Invalid environment variable reference {backend['api_key']!r} for backend "
+                        f"{backend['name']} API key (expected $VAR_NAME)"
+                    )
             
             # Validate timeout
             if "timeout" in backend:
@@ -173,6 +257,25 @@ class Config:
                 except ValueError:
                     raise ConfigValidationError(f"Backend {i} max_image_size_mb must be a number")
 
+        # Validate cache lifetimes (optional)
+        for key in ("command_cache_ttl", "explain_cache_ttl"):
+            if key in config:
+                try:
+                    cache_ttl = int(config[key])
+                    if cache_ttl < 0:
+                        raise ConfigValidationError(f"{key} must be non-negative")
+                except (TypeError, ValueError):
+                    raise ConfigValidationError(f"{key} must be an integer")
+
+        # Validate explain_backend (optional)
+        if config.get("explain_backend") is not None:
+            try:
+                explain_backend = int(config["explain_backend"])
+                if explain_backend < 0:
+                    raise ConfigValidationError("explain_backend must be non-negative")
+            except (TypeError, ValueError):
+                raise ConfigValidationError("explain_backend must be an integer or null")
+
         # Validate stdin section (optional)
         if "stdin" in config:
             if not isinstance(config["stdin"], dict):
@@ -205,112 +308,184 @@ class Config:
                             raise ConfigValidationError("nlgc.default_backend must be non-negative")
                     except ValueError:
                         raise ConfigValidationError("nlgc.default_backend must be an integer or null")
+            if "cache_ttl" in config["nlgc"]:
+                try:
+                    cache_ttl = int(config["nlgc"]["cache_ttl"])
+                    if cache_ttl < 0:
+                        raise ConfigValidationError("nlgc.cache_ttl must be non-negative")
+                except (TypeError, ValueError):
+                    raise ConfigValidationError("nlgc.cache_ttl must be an integer")
 
     def _load_config_file(self, config_file: str) -> None:
-        """Load and validate configuration from file."""
+        """Load and validate configuration from a YAML or JSON file."""
+        if str(config_file).endswith(".json"):
+            file_format, parse_error = "JSON", json.JSONDecodeError
+        else:
+            import yaml
+            file_format, parse_error = "YAML", yaml.YAMLError
+        
         try:
-            with open(config_file, 'r') as f:
-                file_config = yaml.safe_load(f)
+            mtime_ns = os.stat(config_file).st_mtime_ns
+            file_config = _parse_config_file(str(config_file), mtime_ns)
                 
             # Validate configuration
             if file_config:
                 self._validate_config(file_config)
                 self._update_config(self.config, file_config)
-        except yaml.YAMLError as e:
-            raise ConfigValidationError(f"Invalid YAML in config file: {e}")
+        except parse_error as e:
+            raise ConfigValidationError(f"Invalid {file_format} in config file: {e}")
         except Exception as e:
             raise ConfigValidationError(f"Error loading config file: {e}")
     
     def _update_config(self, base_config: Dict[str, Any], new_config: Dict[str, Any]) -> None:
-        """Recursively update configuration.
+        """Update configuration without mutating nested values.
+        
+        Sections present in both configurations are merged into a new dict
+        (copy-on-write); all other values are replaced.
         
         Args:
             base_config: Base configuration to update.
             new_config: New configuration values.
         """
         for key, value in new_config.items():
-            if isinstance(value, dict) and key in base_config and isinstance(base_config[key], dict):
-                # Recursively update nested dictionaries
-                self._update_config(base_config[key], value)
+            base_value = base_config.get(key)
+            if isinstance(value, dict) and isinstance(base_value, dict):
+                base_config[key] = {**base_value, **value}
             else:
-                # Update value
                 base_config[key] = value
     
+    def _set_section_value(self, section: str, key: str, value: Any) -> None:
+        """Set a value in a configuration section without mutating the existing section.
+        
+        Args:
+            section: Section name (e.g. "stdin", "nlgc").
+            key: Key within the section.
+            value: Value to set.
+        """
+        self.config[section] = {**self.config.get(section, {}), key: value}
+    
     def _apply_env_overrides(self) -> None:
         """Apply environment variable overrides to configuration."""
+        env = os.environ
+        
         # Override shell
-        if "NLSH_SHELL" in os.environ:
-            self.config["shell"] = os.environ["NLSH_SHELL"]
+        shell = env.get("NLSH_SHELL")
+        if shell is not None:
+            self.config["shell"] = shell
             
         # Override default backend
-        if "NLSH_DEFAULT_BACKEND" in os.environ:
+        default_backend = env.get("NLSH_DEFAULT_BACKEND")
+        if default_backend is not None:
+            try:
+                self.config["default_backend"] = int(default_backend)
+            except ValueError:
+                pass
+        
+        # Override cache lifetimes
+        for env_var, key in (
+            ("NLSH_COMMAND_CACHE_TTL", "command_cache_ttl"),
+            ("NLSH_EXPLAIN_CACHE_TTL", "explain_cache_ttl"),
+        ):
+            value = env.get(env_var)
+            if value is not None:
+                try:
+                    self.config[key] = int(value)
+                except ValueError:
+                    pass
+        
+        # Override explanation backend
+        explain_backend = env.get("NLSH_EXPLAIN_BACKEND")
+        if explain_backend is not None:
             try:
-                self.config["default_backend"] = int(os.environ["NLSH_DEFAULT_BACKEND"])
+                self.config["explain_backend"] = int(explain_backend)
             except ValueError:
                 pass
                 
         # Apply API keys from environment variables
+        backends = []
         for i, backend in enumerate(self.config["backends"]):
-            # Check for backend-specific API key
-            env_var_name = f"NLSH_BACKEND_{i}_API_KEY"
-            if env_var_name in os.environ:
-                backend["api_key"] = os.environ[env_var_name]
-                
-            # Check for named API key
-            if backend["name"]:
-                env_var_name = f"{backend['name'].upper()}_API_KEY"
-                if env_var_name in os.environ:
-                    backend["api_key"] = os.environ[env_var_name]
-                    
-            # Handle environment variable references in API key
-            if "api_key" in backend and isinstance(backend["api_key"], str):
-                if backend["api_key"].startswith("$"):
-                    env_var = backend["api_key"][1:]
-                    api_key = os.environ.get(env_var, "")
-                    if not api_key:
-                        raise ConfigValidationError(
-                            f"Environment variable {env_var} for backend {backend['name']} API key is empty"
-                        )
-                    backend["api_key"] = api_key
+            api_key = self._resolve_api_key(backend["name"], i, backend.get("api_key"), env)
+            if api_key is not None and api_key != backend.get("api_key"):
+                backend = {**backend, "api_key": api_key}
+            backends.append(backend)
+        self.config["backends"] = backends
         
         # Override nlgc settings
-        if "NLSH_NLGC_INCLUDE_FULL_FILES" in os.environ:
-            env_val = os.environ["NLSH_NLGC_INCLUDE_FULL_FILES"].lower()
-            if env_val in ["true", "1", "yes"]:
-                self.config.setdefault("nlgc", {})["include_full_files"] = True
-            elif env_val in ["false", "0", "no"]:
-                self.config.setdefault("nlgc", {})["include_full_files"] = False
-        
-        if "NLSH_NLGC_LANGUAGE" in os.environ:
-            language = os.environ["NLSH_NLGC_LANGUAGE"].strip()
+        include_full_files = env.get("NLSH_NLGC_INCLUDE_FULL_FILES")
+        if include_full_files is not None:
+            env_val = include_full_files.lower()
+            if env_val in _TRUE_ENV_VALUES:
+                self._set_section_value("nlgc", "include_full_files", True)
+            elif env_val in _FALSE_ENV_VALUES:
+                self._set_section_value("nlgc", "include_full_files", False)
+        
+        language = env.get("NLSH_NLGC_LANGUAGE")
+        if language is not None:
+            language = language.strip()
             if language:
-                self.config.setdefault("nlgc", {})["language"] = language
+                self._set_section_value("nlgc", "language", language)
         
-        # Override stdin settings
-        if "NLSH_STDIN_DEFAULT_BACKEND" in os.environ:
-            try:
-                self.config.setdefault("stdin", {})["default_backend"] = int(os.environ["NLSH_STDIN_DEFAULT_BACKEND"])
-            except ValueError:
-                pass
+        # Override integer settings in the stdin and nlgc sections
+        for env_var, section, key in (
+            ("NLSH_STDIN_DEFAULT_BACKEND", "stdin", "default_backend"),
+            ("NLSH_STDIN_DEFAULT_BACKEND_VISION", "stdin", "default_backend_vision"),
+            ("NLSH_STDIN_MAX_TOKENS", "stdin", "max_tokens"),
+            ("NLSH_NLGC_DEFAULT_BACKEND", "nlgc", "default_backend"),
+            ("NLSH_NLGC_CACHE_TTL", "nlgc", "cache_ttl"),
+        ):
+            value = env.get(env_var)
+            if value is not None:
+                try:
+                    self._set_section_value(section, key, int(value))
+                except ValueError:
+                    pass
+
+    @staticmethod
+    def _resolve_api_key(name: str, index: int, current: Any, env: Mapping[str, str]) -> Any:
+        """Resolve the API key for a backend.
         
-        if "NLSH_STDIN_DEFAULT_BACKEND_VISION" in os.environ:
-            try:
-                self.config.setdefault("stdin", {})["default_backend_vision"] = int(os.environ["NLSH_STDIN_DEFAULT_BACKEND_VISION"])
-            except ValueError:
-                pass
+        Sources are checked in order of precedence: the named variable
+        (e.g. OPENAI_API_KEY), the indexed NLSH_BACKEND_<index>_API_KEY
+        variable, and finally a "$VAR" reference in the configured key.
         
-        if "NLSH_STDIN_MAX_TOKENS" in os.environ:
-            try:
-                self.config.setdefault("stdin", {})["max_tokens"] = int(os.environ["NLSH_STDIN_MAX_TOKENS"])
-            except ValueError:
-                pass
+        Args:
+            name: Backend name.
+            index: Backend index.
+            current: API key currently configured for the backend.
+            env: Environment mapping to resolve variables from.
+            
+        Returns:
+            The resolved API key, or the current value if no source applies.
+            
+        Raises:
+            ConfigValidationError: If a referenced environment variable is empty,
+                or the configured key starts with "$" but is not a valid reference.
+        """
+        if name:
+            api_key = env.get(f"{name.upper()}_API_KEY")
+            if api_key is not None:
+                return api_key
         
-        # Override nlgc default backend
-        if "NLSH_NLGC_DEFAULT_BACKEND" in os.environ:
-            try:
-                self.config.setdefault("nlgc", {})["default_backend"] = int(os.environ["NLSH_NLGC_DEFAULT_BACKEND"])
-            except ValueError:
-                pass
+        api_key = env.get(f"NLSH_BACKEND_{index}_API_KEY")
+        if api_key is not None:
+            return api_key
+        
+        env_ref = _ENV_REF.match(current) if isinstance(current, str) else None
+        if env_ref:
+            env_var = env_ref.group(1)
+            api_key = env.get(env_var, "")
+            if not api_key:
+                raise ConfigValidationError(
+                    f"Environment variable {env_var} for backend {name} API key is empty"
+                )
+            return api_key
+        if isinstance(current, str) and current.startswith("$"):
+            raise ConfigValidationError(
+                f"Invalid environment variable reference {current!r} for backend {name} API key "
+                f"(expected $VAR_NAME)"
+            )
+        
+        return current
 
     def get_shell(self) -> str:
         """Get configured shell.
@@ -320,6 +495,36 @@ class Config:
         """
         return self.config["shell"]
     
+    def get_command_cache_ttl(self) -> int:
+        """Get how long cached generated commands are reused.
+        
+        Returns:
+            int: Lifetime in seconds; 0 disables the cache.
+        """
+        return int(self.config.get("command_cache_ttl", self.DEFAULT_CONFIG["command_cache_ttl"]))
+    
+    def get_explain_cache_ttl(self) -> int:
+        """Get how long cached command explanations are reused.
+        
+        Returns:
+            int: Lifetime in seconds; 0 disables the cache.
+        """
+        return int(self.config.get("explain_cache_ttl", self.DEFAULT_CONFIG["explain_cache_ttl"]))
+    
+    def get_explain_backend(self) -> Optional[int]:
+        """Get appropriate backend index for command explanations.
+        
+        Returns:
+            Optional[int]: Backend index to use for explanations, or None to
+                use the default backend.
+        """
+        if self.config.get("explain_backend") is not None:
+            return int(self.config["explain_backend"])
+        
+        # None selects default_backend, and lets explanations share the main
+        # backend instance
+        return None
+    
     def get_backend(self, index: Optional[int] = None) -> Optional[Dict[str, Any]]:
         """Get backend configuration.
         
@@ -423,6 +628,8 @@ class Config:
         # Create directory if it doesn't exist
         config_path.parent.mkdir(parents=True, exist_ok=True)
         
+        import yaml
+        
         # Write default config
         with open(config_path, 'w') as f:
             yaml.dump(Config.DEFAULT_CONFIG, f, default_flow_style=False)
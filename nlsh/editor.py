@@ -8,6 +8,37 @@ import sys
 import tempfile
 from typing import Optional
 
+
+def _edit_text_inline(initial_text: str) -> Optional[str]:
+    """Edit a single line of text in place on the terminal using readline.
+
+    Args:
+        initial_text: The text to be edited.
+
+    Returns:
+        The edited text, or None if the edit is cancelled or the result is empty.
+
+    Raises:
+        ImportError: If readline is not available on this platform.
+    """
+    import readline
+
+    readline.set_startup_hook(lambda: readline.insert_text(initial_text))
+    try:
+        edited_text = input("Edit: ").strip()
+    except EOFError:
+        print()
+        edited_text = ""
+    finally:
+        readline.set_startup_hook()
+
+    if not edited_text:
+        print("Edit cancelled or resulting text is empty.", file=sys.stderr)
+        return None
+
+    return edited_text
+
+
 def edit_text_in_editor(initial_text: str, suffix: str = ".txt") -> Optional[str]:
     """Opens the default editor to edit the given text.
 
@@ -20,6 +51,19 @@ def edit_text_in_editor(initial_text: str, suffix: str = ".txt") -> Optional[str
         or None if the edit is cancelled, the resulting text is empty,
         or an error occurs during editing.
     """
+    # Without a configured editor, edit single-line text in place rather than
+    # launching vim through a temporary file
+    if (
+        "EDITOR" not in os.environ
+        and "\n" not in initial_text
+        and sys.stdin.isatty()
+        and sys.stdout.isatty()
+    ):
+        try:
+            return _edit_text_inline(initial_text)
+        except ImportError:
+            pass
+
     editor = os.environ.get("EDITOR", "vim")  # Fallback to vim
 
     try:
@@ -53,8 +97,10 @@ def edit_text_in_editor(initial_text: str, suffix: str = ".txt") -> Optional[str
         return None
     finally:
         # Attempt cleanup if temp_file_path was created
-        if 'temp_file_path' in locals() and os.path.exists(temp_file_path):
+        if 'temp_file_path' in locals():
             try:
                 os.remove(temp_file_path)
+            except FileNotFoundError:
+                pass
             except Exception as cleanup_err:
                 print(f"Error cleaning up temporary file: {cleanup_err}", file=sys.stderr)
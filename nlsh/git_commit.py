@@ -6,6 +6,8 @@ This module provides the command-line interface for the nlgc utility,
 which generates Git commit messages based on staged changes.
 """
 
+from __future__ import annotations
+
 import argparse
 import asyncio
 import os
@@ -13,16 +15,26 @@ import signal
 import subprocess
 import sys
 import traceback
-from typing import List, Optional, Union, Dict
-
-import openai  # For catching potential API errors like context length
+from typing import TYPE_CHECKING, List, Optional, Union
 
 from nlsh.config import Config, ConfigValidationError
-from nlsh.backends import BackendManager
 from nlsh.spinner import Spinner
-from nlsh.cli import handle_keyboard_interrupt, log
+from nlsh.cli import (
+    EDIT_RESPONSES,
+    REGENERATE_RESPONSES,
+    YES_RESPONSES,
+    handle_keyboard_interrupt,
+    log,
+    run_async,
+)
 from nlsh.editor import edit_text_in_editor
 from nlsh.prompt import PromptBuilder
+from nlsh.response_cache import get_cache_path, read_cached_response, write_cached_response
+
+# The backends module pulls in openai, which dominates startup time; it is
+# imported only once a commit message is actually requested.
+if TYPE_CHECKING:
+    from nlsh.backends import LLMBackend
 
 
 # Custom Exceptions
@@ -43,8 +55,8 @@ class EmptyCommitMessageError(NlgcError):
     pass
 
 
-FILE_CONTENT_HEADER = "Full content of changed files:"
 GIT_COMMIT_MESSAGE_MAX_TOKENS = 150
+DEFAULT_MAX_CONCURRENT_REQUESTS = 8
 
 
 def parse_args(args: List[str]) -> argparse.Namespace:
@@ -118,17 +130,101 @@ def parse_args(args: List[str]) -> argparse.Namespace:
         help="Language for commit message generation (e.g., 'Spanish', 'French', 'German')"
     )
 
+    # Parallel candidate generation
+    parser.add_argument(
+        "--candidates", "-n",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Generate N candidate messages in parallel and offer them in turn (default: 1)"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Don't reuse a cached commit message for an identical prompt (overrides nlgc.cache_ttl)."
+    )
+    parser.add_argument(
+        "--max-concurrent",
+        type=int,
+        default=DEFAULT_MAX_CONCURRENT_REQUESTS,
+        metavar="N",
+        help=f"Maximum number of concurrent LLM requests (default: {DEFAULT_MAX_CONCURRENT_REQUESTS})"
+    )
+
     return parser.parse_args(args)
 
 
-def _get_git_root() -> str:
+async def _run_git(*git_args: str) -> str:
+    """Run a git command as an asyncio subprocess.
+
+    Args:
+        *git_args: Arguments passed to git.
+
+    Returns:
+        str: The command's stdout, decoded once as UTF-8 (undecodable bytes
+            are replaced).
+
+    Raises:
+        FileNotFoundError: If git is not installed.
+        subprocess.CalledProcessError: If git exits with a non-zero status.
+    """
+    process = await asyncio.create_subprocess_exec(
+        'git', *git_args,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    stdout, stderr = await process.communicate()
+    if process.returncode != 0:
+        raise subprocess.CalledProcessError(
+            process.returncode,
+            ['git', *git_args],
+            output=stdout.decode('utf-8', errors='replace'),
+            stderr=stderr.decode('utf-8', errors='replace'),
+        )
+    return stdout.decode('utf-8', errors='replace')
+
+
+# Environment variables that change how git discovers the repository
+_GIT_DISCOVERY_ENV_VARS = (
+    'GIT_DIR',
+    'GIT_WORK_TREE',
+    'GIT_CEILING_DIRECTORIES',
+    'GIT_DISCOVERY_ACROSS_FILESYSTEM',
+)
+
+
+def _find_git_root() -> Optional[str]:
+    """Find the work tree root by looking for .git in the current directory and its parents.
+
+    Returns:
+        Optional[str]: The work tree root, or None if it can't be determined
+            without asking git (no .git found, running inside a .git
+            directory, or discovery overridden through the environment).
+    """
+    if any(var in os.environ for var in _GIT_DISCOVERY_ENV_VARS):
+        return None
+
+    path = os.getcwd()
+    if '.git' in path.split(os.sep):
+        return None
+    while True:
+        # .git is a directory in a regular clone and a file in worktrees and submodules
+        if os.path.exists(os.path.join(path, '.git')):
+            return path
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+
+
+async def _get_git_root() -> str:
     """Find the root directory of the git repository."""
+    git_root = _find_git_root()
+    if git_root is not None:
+        return git_root
+
     try:
-        result = subprocess.run(
-            ['git', 'rev-parse', '--show-toplevel'],
-            capture_output=True, text=True, check=True, encoding='utf-8'
-        )
-        return result.stdout.strip()
+        return (await _run_git('rev-parse', '--show-toplevel')).strip()
     except FileNotFoundError:
         raise GitCommandError("Git command not found. Make sure Git is installed and in your PATH.")
     except subprocess.CalledProcessError as e:
@@ -138,7 +234,7 @@ def _get_git_root() -> str:
         raise GitCommandError(f"Failed to get git root directory: {str(e)}") from e
 
 
-def get_git_diff(staged: bool = True) -> str:
+async def get_git_diff(staged: bool = True) -> str:
     """Get the git diff.
     
     Args:
@@ -150,15 +246,15 @@ def get_git_diff(staged: bool = True) -> str:
     Raises:
         RuntimeError: If git command fails or not in a git repository.
     """
-    command = ['git', 'diff']
+    git_args = ['diff']
     if staged:
-        command.append('--staged')
+        git_args.append('--staged')
         
     try:
-        result = subprocess.run(command, capture_output=True, text=True, check=True, encoding='utf-8')
-        if not result.stdout.strip():
+        diff = await _run_git(*git_args)
+        if not diff or diff.isspace():
             raise RuntimeError("No changes detected." + (" Add files to staging area or use appropriate flags." if staged else ""))
-        return result.stdout
+        return diff
     except FileNotFoundError:
         raise GitCommandError("Git command not found. Make sure Git is installed and in your PATH.")
     except subprocess.CalledProcessError as e:
@@ -170,7 +266,7 @@ def get_git_diff(staged: bool = True) -> str:
         raise GitCommandError(f"Failed to get git diff: {str(e)}")
 
 
-def get_changed_files(staged: bool = True) -> List[str]:
+async def get_changed_files(staged: bool = True) -> List[str]:
     """Get the list of changed files relative to the git root.
 
     Args:
@@ -182,19 +278,48 @@ def get_changed_files(staged: bool = True) -> List[str]:
     Raises:
         RuntimeError: If git command fails.
     """
-    command = ['git', 'diff', '--name-only']
+    git_args = ['diff', '--name-only']
     if staged:
-        command.append('--staged')
+        git_args.append('--staged')
         
     try:
-        result = subprocess.run(command, capture_output=True, text=True, check=True, encoding='utf-8')
-        return [line for line in result.stdout.strip().split('\n') if line]
+        names = await _run_git(*git_args)
+        return [line for line in names.splitlines() if line]
     except subprocess.CalledProcessError as e:
         raise GitCommandError(f"Git diff --name-only command failed: {e.stderr}")
     except Exception as e:
         raise GitCommandError(f"Failed to get changed file list: {str(e)}")
 
 
+async def _gather_git_info(staged: bool, include_changed_files: bool) -> tuple:
+    """Run the git queries needed by nlgc concurrently.
+
+    Args:
+        staged: Whether to look at staged changes only.
+        include_changed_files: Whether to also list the changed files.
+
+    Returns:
+        tuple: (git_root, git_diff, changed_files); changed_files is None
+            if include_changed_files is False.
+
+    Raises:
+        GitCommandError: If a git command fails. When several fail, the
+            error of the first query (root, diff, files) is raised.
+    """
+    queries = [_get_git_root(), get_git_diff(staged=staged)]
+    if include_changed_files:
+        queries.append(get_changed_files(staged=staged))
+    
+    results = await asyncio.gather(*queries, return_exceptions=True)
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+    
+    if not include_changed_files:
+        results.append(None)
+    return tuple(results)
+
+
 def read_file_content(file_path: str, git_root: str) -> Optional[str]:
     """Read the content of a file relative to the git root.
 
@@ -218,151 +343,232 @@ def read_file_content(file_path: str, git_root: str) -> Optional[str]:
         return None
 
 
-def generate_commit_message(
-    config: Config,
-    backend_index: Optional[int],
-    git_diff: str,
-    changed_files_content: Optional[Dict[str, str]], # Dict of {filepath: content}
-    verbose: bool = False,
+async def read_files_content(file_paths: List[str], git_root: str) -> List[Optional[str]]:
+    """Read several files relative to the git root concurrently.
+
+    Args:
+        file_paths: Paths relative to git root.
+        git_root: Absolute path to the git repository root.
+
+    Returns:
+        List of file contents (None for files that could not be read),
+        in the same order as file_paths.
+    """
+    loop = asyncio.get_running_loop()
+    return await asyncio.gather(*(
+        loop.run_in_executor(None, read_file_content, file_path, git_root)
+        for file_path in file_paths
+    ))
+
+
+def _generation_error(error: Exception) -> NlgcError:
+    """Translate an exception raised by the backend into an nlgc error."""
+    import openai  # For catching potential API errors like context length
+
+    if isinstance(error, openai.BadRequestError):
+        # Handle context length errors specifically
+        error_str = str(error).lower()
+        if "context_length_exceeded" in error_str or "too large" in error_str or "context length" in error_str:
+            error_msg = (
+                "Error: The diff and file contents combined are too large for the selected model's context window.\n"
+                "Try running again with the '--no-full-files' flag."
+            )
+            print(error_msg, file=sys.stderr)
+            return ContextLengthExceededError(error_msg)
+        
+        return NlgcError(f"LLM API request failed: {str(error)}")
+    return NlgcError(f"Error generating commit message: {str(error)}")
+
+
+async def _request_commit_message(
+    backend: LLMBackend,
+    system_prompt: str,
+    user_prompt: str,
+    verbose: int = 0,
     log_file: Optional[str] = None,
-    language: Optional[str] = None,
+    regeneration_count: int = 0,
 ) -> str:
-    """Generate a commit message using the specified backend.
+    """Request a single commit message from the backend and log it.
 
     Raises:
         ContextLengthExceededError: If the prompt is too long for the model.
         EmptyCommitMessageError: If the model returns an empty message.
         NlgcError: For other API or backend errors.
     """
-    # Initialize backend and build prompts
-    backend_manager = BackendManager(config)
-    backend = backend_manager.get_backend(backend_index)
-    
-    prompt_builder = PromptBuilder(config)
-    system_prompt = prompt_builder.build_git_commit_system_prompt(language)
-    user_prompt = prompt_builder.build_git_commit_user_prompt(git_diff, changed_files_content)
-
-    # Start spinner if not in verbose mode
-    spinner = None
-    if not verbose:
-        spinner = Spinner("Generating commit message")
-        spinner.start()
-
     try:
-        # Generate response
-        response_content = asyncio.run(backend.generate_response(
+        response_content = await backend.generate_response(
             user_prompt, 
             system_prompt, 
             verbose=verbose, 
             strip_markdown=True,
-            max_tokens=GIT_COMMIT_MESSAGE_MAX_TOKENS
-        ))
+            max_tokens=GIT_COMMIT_MESSAGE_MAX_TOKENS, 
+            regeneration_count=regeneration_count
+        )
+    except Exception as e:
+        raise _generation_error(e) from e
 
-        log(log_file, backend, system_prompt, user_prompt, response_content)
+    log(log_file, backend, system_prompt, user_prompt, response_content, backend.last_usage)
 
-        if not response_content:
-            raise EmptyCommitMessageError("LLM returned an empty commit message.")
+    if not response_content:
+        raise EmptyCommitMessageError("LLM returned an empty commit message.")
 
-        return response_content
+    return response_content
 
-    except openai.BadRequestError as e:
-        # Handle context length errors specifically
-        error_str = str(e).lower()
-        if "context_length_exceeded" in error_str or "too large" in error_str or "context length" in error_str:
-            error_msg = (
-                "Error: The diff and file contents combined are too large for the selected model's context window.\n"
-                "Try running again with the '--no-full-files' flag."
-            )
-            print(error_msg, file=sys.stderr)
-            raise ContextLengthExceededError(error_msg) from e
-        
-        # Re-raise other BadRequestErrors
-        raise NlgcError(f"LLM API request failed: {str(e)}") from e
-    except Exception as e:
-        # Re-raise other exceptions
-        if not isinstance(e, (ContextLengthExceededError, EmptyCommitMessageError)):
-            raise NlgcError(f"Error generating commit message: {str(e)}") from e
-        raise
+
+def _run_with_spinner(message: str, coro, verbose: int = 0):
+    """Run a coroutine to completion, showing a spinner unless in verbose mode."""
+    spinner = None
+    if not verbose:
+        spinner = Spinner(message)
+        spinner.start()
+
+    try:
+        return run_async(coro)
     finally:
         # Always stop the spinner
         if spinner:
             spinner.stop()
 
 
-def generate_commit_message_regeneration(
-    config: Config,
-    backend_index: Optional[int],
-    git_diff: str,
-    changed_files_content: Optional[Dict[str, str]],
-    declined_messages: List[str],
-    verbose: bool = False,
+def generate_commit_message(
+    backend: LLMBackend,
+    prompt_builder: PromptBuilder,
+    system_prompt: str,
+    changes_section: str,
+    verbose: int = 0,
     log_file: Optional[str] = None,
-    language: Optional[str] = None,
+    cache_ttl: int = 0,
 ) -> str:
-    """Generate a regenerated commit message using the specified backend.
+    """Generate a commit message using the specified backend.
+
+    changes_section is the output of PromptBuilder.build_git_changes_section.
+    If cache_ttl is positive, a message generated for the same prompts and
+    backend within the last cache_ttl seconds is reused instead of calling
+    the backend.
 
     Raises:
         ContextLengthExceededError: If the prompt is too long for the model.
         EmptyCommitMessageError: If the model returns an empty message.
         NlgcError: For other API or backend errors.
     """
-    # Initialize backend and build prompts
-    backend_manager = BackendManager(config)
-    backend = backend_manager.get_backend(backend_index)
-    regeneration_count = len(declined_messages)
-    
-    prompt_builder = PromptBuilder(config)
-    system_prompt = prompt_builder.build_git_commit_regeneration_system_prompt(language)
-    user_prompt = prompt_builder.build_git_commit_regeneration_user_prompt(
-        git_diff, changed_files_content, declined_messages
+    user_prompt = prompt_builder.build_git_commit_user_prompt(None, changes_section=changes_section)
+
+    cache_path = None
+    if cache_ttl > 0:
+        cache_path = get_cache_path("commits", backend.url, backend.model, system_prompt, user_prompt)
+        cached = read_cached_response(cache_path, cache_ttl)
+        if cached:
+            print("Using cached commit message (press 'r' to regenerate).", file=sys.stderr)
+            return cached
+
+    commit_message = _run_with_spinner(
+        "Generating commit message",
+        _request_commit_message(backend, system_prompt, user_prompt, verbose, log_file),
+        verbose,
     )
+    if cache_path:
+        write_cached_response(cache_path, commit_message)
+    return commit_message
 
-    # Start spinner if not in verbose mode
-    spinner = None
-    if not verbose:
-        spinner = Spinner("Regenerating commit message")
-        spinner.start()
 
+async def generate_many(
+    backend: LLMBackend,
+    system_prompt: str,
+    user_prompt: str,
+    n: int,
+    max_concurrent: int = DEFAULT_MAX_CONCURRENT_REQUESTS,
+    log_file: Optional[str] = None,
+) -> List[str]:
+    """Request n commit messages concurrently.
+
+    At most max_concurrent requests are in flight at once, each sampled at a
+    higher temperature than the previous one so the candidates differ. They
+    are never streamed, even in verbose mode. Empty responses are dropped.
+
+    Returns:
+        List[str]: Distinct commit messages, in request order.
+
+    Raises:
+        ContextLengthExceededError: If the prompt is too long for the model.
+        EmptyCommitMessageError: If the model returns an empty message.
+        NlgcError: For other API or backend errors.
+    """
     try:
-        # Generate response
-        response_content = asyncio.run(backend.generate_response(
-            user_prompt, 
-            system_prompt, 
-            verbose=verbose, 
+        messages = await backend.generate_batch(
+            [user_prompt] * n,
+            system_prompt,
+            max_concurrent=max_concurrent,
+            regeneration_counts=list(range(n)),
             strip_markdown=True,
-            max_tokens=GIT_COMMIT_MESSAGE_MAX_TOKENS, 
-            regeneration_count=regeneration_count
-        ))
+            max_tokens=GIT_COMMIT_MESSAGE_MAX_TOKENS,
+        )
+    except Exception as e:
+        raise _generation_error(e) from e
 
-        log(log_file, backend, system_prompt, user_prompt, response_content)
+    for message in messages:
+        log(log_file, backend, system_prompt, user_prompt, message)
 
-        if not response_content:
-            raise EmptyCommitMessageError("LLM returned an empty commit message.")
+    messages = [message for message in messages if message]
+    if not messages:
+        raise EmptyCommitMessageError("LLM returned an empty commit message.")
+    return list(dict.fromkeys(messages))
 
-        return response_content
 
-    except openai.BadRequestError as e:
-        # Handle context length errors specifically
-        error_str = str(e).lower()
-        if "context_length_exceeded" in error_str or "too large" in error_str or "context length" in error_str:
-            error_msg = (
-                "Error: The diff and file contents combined are too large for the selected model's context window.\n"
-                "Try running again with the '--no-full-files' flag."
-            )
-            print(error_msg, file=sys.stderr)
-            raise ContextLengthExceededError(error_msg) from e
-        
-        # Re-raise other BadRequestErrors
-        raise NlgcError(f"LLM API request failed: {str(e)}") from e
-    except Exception as e:
-        # Re-raise other exceptions
-        if not isinstance(e, (ContextLengthExceededError, EmptyCommitMessageError)):
-            raise NlgcError(f"Error generating commit message: {str(e)}") from e
-        raise
-    finally:
-        # Always stop the spinner
-        if spinner:
-            spinner.stop()
+def generate_commit_message_candidates(
+    backend: LLMBackend,
+    prompt_builder: PromptBuilder,
+    system_prompt: str,
+    changes_section: str,
+    n: int,
+    max_concurrent: int = DEFAULT_MAX_CONCURRENT_REQUESTS,
+    log_file: Optional[str] = None,
+) -> List[str]:
+    """Generate several candidate commit messages in parallel.
+
+    changes_section is the output of PromptBuilder.build_git_changes_section.
+
+    Raises:
+        ContextLengthExceededError: If the prompt is too long for the model.
+        EmptyCommitMessageError: If the model returns an empty message.
+        NlgcError: For other API or backend errors.
+    """
+    user_prompt = prompt_builder.build_git_commit_user_prompt(None, changes_section=changes_section)
+    # Candidates are not streamed, so show the spinner even in verbose mode
+    return _run_with_spinner(
+        f"Generating {n} commit messages",
+        generate_many(backend, system_prompt, user_prompt, n, max_concurrent, log_file),
+    )
+
+
+def generate_commit_message_regeneration(
+    backend: LLMBackend,
+    prompt_builder: PromptBuilder,
+    system_prompt: str,
+    changes_section: str,
+    declined_messages: List[str],
+    verbose: int = 0,
+    log_file: Optional[str] = None,
+) -> str:
+    """Generate a regenerated commit message using the specified backend.
+
+    changes_section is the output of PromptBuilder.build_git_changes_section.
+
+    Raises:
+        ContextLengthExceededError: If the prompt is too long for the model.
+        EmptyCommitMessageError: If the model returns an empty message.
+        NlgcError: For other API or backend errors.
+    """
+    user_prompt = prompt_builder.build_git_commit_regeneration_user_prompt(
+        None, declined_messages=declined_messages, changes_section=changes_section
+    )
+    return _run_with_spinner(
+        "Regenerating commit message",
+        _request_commit_message(
+            backend, system_prompt, user_prompt, verbose, log_file,
+            regeneration_count=len(declined_messages),
+        ),
+        verbose,
+    )
 
 
 def confirm_commit(message: str) -> Union[bool, str]:
@@ -373,24 +579,24 @@ def confirm_commit(message: str) -> Union[bool, str]:
     print("-" * 20)
     response = input("[Confirm] Use this message? (y/N/e/r) ").strip().lower()
     
-    if response in ["r", "regenerate"]:
+    if response in REGENERATE_RESPONSES:
         return "regenerate"
-    if response in ["e", "edit"]:
+    if response in EDIT_RESPONSES:
         return "edit"
     
-    return response in ["y", "yes"]
+    return response in YES_RESPONSES
 
 
 def run_git_commit(message: str) -> int:
     """Run the git commit command."""
     try:
-        # Using -m avoids needing an editor for simple cases
-        result = subprocess.run(['git', 'commit', '-m', message], check=True, encoding='utf-8')
-        result.check_returncode()
+        # Pass the message on stdin (-F -) so it isn't subject to argv limits;
+        # git's own output goes straight to the terminal
+        subprocess.run(['git', 'commit', '-F', '-'], input=message.encode('utf-8'), check=True)
         print("Commit successful.")
         return 0
     except subprocess.CalledProcessError as e:
-        print(f"Git commit failed:\n{e.stderr}", file=sys.stderr)
+        print(f"Git commit failed with exit code {e.returncode}.", file=sys.stderr)
         return 1
     except Exception as e:
         print(f"Error running git commit: {str(e)}", file=sys.stderr)
@@ -411,17 +617,17 @@ def _prepare_git_data(args, include_full_files):
         GitCommandError: If a git command fails.
         RuntimeError: If there are no changes to commit.
     """
-    git_root = _get_git_root()
-    git_diff = get_git_diff(staged=not args.all)
+    git_root, git_diff, changed_files = run_async(
+        _gather_git_info(staged=not args.all, include_changed_files=include_full_files)
+    )
     
     changed_files_content = None
     if include_full_files:
-        changed_files = get_changed_files(staged=not args.all)
         if changed_files:
             print(f"Reading content of {len(changed_files)} changed file(s)...")
             changed_files_content = {}
-            for file_path in changed_files:
-                content = read_file_content(file_path, git_root)
+            contents = run_async(read_files_content(changed_files, git_root))
+            for file_path, content in zip(changed_files, contents):
                 if content is not None:
                     MAX_FILE_SIZE = 100 * 1024
                     if len(content) > MAX_FILE_SIZE:
@@ -432,16 +638,18 @@ def _prepare_git_data(args, include_full_files):
     return git_diff, changed_files_content
 
 
-def _generate_and_confirm_message(config, args, git_diff, changed_files_content, declined_messages=None, language=None):
+def _generate_and_confirm_message(backend, prompt_builder, system_prompts, args, changes_section, declined_messages=None, pending_messages=None, cache_ttl=0):
     """Generate and confirm a commit message.
     
     Args:
-        config: Configuration object.
+        backend: Backend used for generation.
+        prompt_builder: Prompt builder for the user prompts.
+        system_prompts: Tuple of (initial, regeneration) system prompts.
         args: Command-line arguments.
-        git_diff: Git diff output.
-        changed_files_content: Dict of file contents.
+        changes_section: Diff and file contents section of the user prompt.
         declined_messages: List of previously declined messages.
-        language: Language for commit message generation.
+        pending_messages: Candidates generated in advance and not yet shown.
+        cache_ttl: Seconds to reuse a cached message; 0 disables the cache.
         
     Returns:
         tuple: (success, exit_code)
@@ -451,28 +659,44 @@ def _generate_and_confirm_message(config, args, git_diff, changed_files_content,
     """
     if declined_messages is None:
         declined_messages = []
+    if pending_messages is None:
+        pending_messages = []
     
-    # Use regeneration function if we have declined messages, otherwise use initial generation
-    if declined_messages:
+    # Offer candidates generated in advance first, then regenerate if we have
+    # declined messages, otherwise use initial generation
+    if pending_messages:
+        commit_message = pending_messages.pop(0)
+    elif declined_messages:
         commit_message = generate_commit_message_regeneration(
-            config,
-            args.backend,
-            git_diff,
-            changed_files_content,
+            backend,
+            prompt_builder,
+            system_prompts[1],
+            changes_section,
             declined_messages,
-            verbose=args.verbose > 0,
+            verbose=args.verbose,
             log_file=args.log_file,
-            language=language,
         )
+    elif args.candidates > 1:
+        candidates = generate_commit_message_candidates(
+            backend,
+            prompt_builder,
+            system_prompts[0],
+            changes_section,
+            args.candidates,
+            max_concurrent=args.max_concurrent,
+            log_file=args.log_file,
+        )
+        commit_message = candidates[0]
+        pending_messages.extend(candidates[1:])
     else:
         commit_message = generate_commit_message(
-            config,
-            args.backend,
-            git_diff,
-            changed_files_content,
-            verbose=args.verbose > 0,
+            backend,
+            prompt_builder,
+            system_prompts[0],
+            changes_section,
+            verbose=args.verbose,
             log_file=args.log_file,
-            language=language,
+            cache_ttl=cache_ttl,
         )
 
     confirmation = confirm_commit(commit_message)
@@ -518,6 +742,9 @@ def _main(config: Config, args: argparse.Namespace) -> int:
     elif nlgc_config.get("language"):
         language = nlgc_config.get("language")
     
+    # Use the configured cache lifetime unless --no-cache was given
+    cache_ttl = 0 if args.no_cache else int(nlgc_config.get("cache_ttl", 0))
+    
     # Override backend selection if not explicitly set via CLI
     if args.backend is None:
         # Use nlgc-specific backend if configured
@@ -531,12 +758,30 @@ def _main(config: Config, args: argparse.Namespace) -> int:
         print(f"Error: {str(e)}", file=sys.stderr)
         return 1
 
+    # Resolve the backend and build the system prompts and the changes section
+    # once; they don't change between regenerations
+    from nlsh.backends import get_backend_manager
+
+    try:
+        backend = get_backend_manager(config).get_backend(args.backend)
+    except ValueError as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        return 1
+    prompt_builder = PromptBuilder(config)
+    changes_section = prompt_builder.build_git_changes_section(git_diff, changed_files_content)
+    system_prompts = (
+        prompt_builder.build_git_commit_system_prompt(language),
+        prompt_builder.build_git_commit_regeneration_system_prompt(language),
+    )
+
     # Generate and confirm commit message
     declined_messages = []
+    pending_messages = []
     while True:
         try:
             done, exit_code = _generate_and_confirm_message(
-                config, args, git_diff, changed_files_content, declined_messages, language
+                backend, prompt_builder, system_prompts, args, changes_section,
+                declined_messages, pending_messages, cache_ttl
             )
             if done:
                 return exit_code
@@ -557,9 +802,11 @@ def main() -> None:
     """Synchronous wrapper function for the nlgc entry point."""
     signal.signal(signal.SIGINT, handle_keyboard_interrupt)
     exit_code = 1 # Default exit code
+    verbose_level = 0
     try:
         # Parse args
         args = parse_args(sys.argv[1:])
+        verbose_level = args.verbose
         
         # Handle --init flag
         if args.init:
@@ -571,8 +818,10 @@ def main() -> None:
         
         # Notify if no config file was found
         if not config.config_file_found:
-            print("Note: No configuration file found at default locations.", file=sys.stderr)
-            print("Using default configuration. Run 'nlgc --init' to create a config file.", file=sys.stderr)
+            sys.stderr.write(
+                "Note: No configuration file found at default locations.\n"
+                "Using default configuration. Run 'nlgc --init' to create a config file.\n"
+            )
             print()
 
         exit_code = _main(config, args)
@@ -580,29 +829,18 @@ def main() -> None:
     except (ConfigValidationError, GitCommandError, NlgcError, ValueError) as e:
         # Catch known errors that might occur during config loading or async execution
         print(f"Error: {str(e)}", file=sys.stderr)
-        if _get_verbose_level() > 1: traceback.print_exc(file=sys.stderr)
+        if verbose_level > 1: traceback.print_exc(file=sys.stderr)
         exit_code = 1
     except KeyboardInterrupt:
         print("\nOperation cancelled by user", file=sys.stderr)
         exit_code = 130
     except Exception as e:
         print(f"Fatal error: {str(e)}", file=sys.stderr)
-        if _get_verbose_level() > 1: traceback.print_exc(file=sys.stderr)
+        if verbose_level > 1: traceback.print_exc(file=sys.stderr)
         exit_code = 1
     finally:
         sys.exit(exit_code)
 
 
-def _get_verbose_level() -> int:
-    verbose_level = 0
-    for _, arg in enumerate(sys.argv):
-        if arg == '-v': verbose_level += 1
-        if arg == '--verbose': verbose_level += 1
-        if arg.startswith('-v') and not arg.startswith('--'):
-            verbose_level += len(arg) -1
-    
-    return verbose_level
-
-
 if __name__ == "__main__":
     main()
@@ -8,6 +8,15 @@ import base64
 import io
 from typing import Tuple, Optional
 
+# Base64 encodings of the image magic bytes recognized by detect_input_type
+_BASE64_IMAGE_PREFIXES = (
+    'iVBORw0KGg',  # PNG
+    '/9j/',  # JPEG
+    'R0lGOD',  # GIF
+    'UklGR',  # WEBP (RIFF)
+    'Qk',  # BMP
+)
+
 
 def detect_input_type(data: bytes) -> str:
     """Detect the type of input data.
@@ -39,7 +48,7 @@ def detect_input_type(data: bytes) -> str:
         if data_str.startswith('data:image/'):
             # Extract MIME type from data URL
             if ';base64,' in data_str:
-                mime_type = data_str.split(';base64,')[0].replace('data:', '')
+                mime_type = data_str.partition(';base64,')[0].replace('data:', '')
                 return mime_type
         elif _is_base64_image(data_str):
             # Try to detect format from base64 data
@@ -68,6 +77,10 @@ def _is_base64_image(data_str: str) -> bool:
     if len(data_str) < 100:  # Too short to be an image
         return False
     
+    # Reject text without an image signature before cleaning up the whole input
+    if not ''.join(data_str[:64].split()).startswith(_BASE64_IMAGE_PREFIXES):
+        return False
+    
     # Check if it's valid base64
     try:
         # Remove whitespace and check if it's valid base64
@@ -113,7 +126,7 @@ def prepare_image_for_api(data: bytes, mime_type: str) -> Tuple[str, str]:
         if data_str.startswith('data:image/'):
             # Extract base64 part from data URL
             if ';base64,' in data_str:
-                base64_part = data_str.split(';base64,')[1]
+                base64_part = data_str.partition(';base64,')[2]
                 return base64_part, mime_type
         elif _is_base64_image(data_str):
             # Clean up base64 string
@@ -4,13 +4,21 @@ Prompt engineering for nlsh.
 This module provides functionality for constructing prompts for LLMs.
 """
 
-from typing import List
+import asyncio
+import concurrent.futures
+import functools
+from typing import List, Optional
 
 from nlsh.tools.base import BaseTool
 
 
 class PromptBuilder:
-    """Builder for LLM prompts."""
+    """Builder for LLM prompts.
+    
+    System prompt templates keep all static instructions ahead of the
+    per-invocation {system_context} block, so providers that cache prompt
+    prefixes can reuse everything up to the context.
+    """
     
     # Base system prompt template
     BASE_SYSTEM_PROMPT = """You are an AI assistant that generates shell commands based on user requests.
@@ -18,11 +26,10 @@ Your task is to generate a single shell command or a short oneliner script that
 Only generate commands for the `{shell}` shell.
 Do not include explanations or descriptions.
 Ensure the commands are safe and do not cause data loss or security issues.
+Generate only the command, nothing else.
 Use the following system context to inform your command generation:
 
-{system_context}
-
-Generate only the command, nothing else."""
+{system_context}"""
 
     # Fixing system prompt template
     FIXING_SYSTEM_PROMPT = """You are an AI assistant that fixes failed shell commands.
@@ -30,12 +37,11 @@ Your task is to analyze a failed command and generate a fixed version that will
 Only generate commands for the `{shell}` shell.
 Do not include explanations or descriptions.
 Ensure the commands are safe and do not cause data loss or security issues.
+Generate only the fixed command, nothing else. If the original command is completely wrong or cannot be fixed, 
+generate a new command that accomplishes the original intent.
 Use the following system context to inform your command generation:
 
-{system_context}
-
-Generate only the fixed command, nothing else. If the original command is completely wrong or cannot be fixed, 
-generate a new command that accomplishes the original intent."""
+{system_context}"""
 
     # Explanation system prompt template
     EXPLANATION_SYSTEM_PROMPT = """You are an AI assistant that explains shell commands for `{shell}` in plain text. 
@@ -48,15 +54,14 @@ When the user provides a command, follow these steps:
 4. RISKS: Highlight dangers (e.g., data loss, permissions). If none, state "No significant risks."
 5. IMPROVEMENTS: Suggest safer/more efficient alternatives if relevant.
 
-Use the system context below to tailor the explanation:
-{system_context}
-
-
 Formatting rules:
 - DO NOT USE Markdown
 - Use uppercase headings like "PURPOSE:", "RISKS:".
 - Separate sections with two newlines.
-- Avoid technical jargon if possible."""
+- Avoid technical jargon if possible.
+
+Use the system context below to tailor the explanation:
+{system_context}"""
 
     # Git commit system prompt template
     GIT_COMMIT_SYSTEM_PROMPT = """You are an AI assistant that generates concise git commit messages following conventional commit standards (e.g., 'feat: description', 'fix: description', 'docs: description').
@@ -76,6 +81,9 @@ Output only the commit message (subject and optional body). Do not include expla
 {language_instruction}
 """
 
+    # Header for the full file contents in nlgc user prompts
+    GIT_FILE_CONTENT_HEADER = "Full content of changed files:\n"
+
     # STDIN processing system prompt template
     STDIN_PROCESSING_SYSTEM_PROMPT = """You are an AI assistant that processes text input according to user instructions.
 You will receive text content from STDIN and a user instruction about what to do with that content.
@@ -93,11 +101,10 @@ Your task is to generate a different shell command that accomplishes the user's
 Only generate commands for the `{shell}` shell.
 Do not include explanations or descriptions.
 Ensure the commands are safe and do not cause data loss or security issues.
+Generate only the command, nothing else.
 
 Use the following system context to inform your command generation:
-{system_context}
-
-Generate only the command, nothing else."""
+{system_context}"""
     
     def __init__(self, config):
         """Initialize the prompt builder.
@@ -107,41 +114,130 @@ Generate only the command, nothing else."""
         """
         self.config = config
         self.shell = config.get_shell()
+        # Last gathered tool context, as (tools, context)
+        self._tools_context = None
+        # Latest get_context result (or exception) of each tool
+        self._tool_results = {}
+        # Last formatted prompt of each template, as (system_context, prompt)
+        self._formatted_prompts = {}
+        # get_context calls started ahead of the first prompt, by tool
+        self._prefetched_contexts = {}
+    
+    def prefetch_tools_context(self, tools: List[BaseTool]) -> None:
+        """Start gathering tool context in background threads.
+        
+        Lets the tools run while the caller does other startup work (such as
+        importing the backend libraries); the first prompt built with these
+        tools picks up the results.
+        
+        Args:
+            tools: List of tool instances.
+        """
+        pending = [tool for tool in tools if tool not in self._tool_results]
+        if not pending:
+            return
+        
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=len(pending))
+        for tool in pending:
+            self._prefetched_contexts[tool] = executor.submit(tool.get_context)
+        executor.shutdown(wait=False)
     
 
-    def _gather_tools_context(self, tools: List[BaseTool]) -> str:
+    async def _gather_tools_context(self, tools: List[BaseTool], refresh: bool = False) -> str:
+        """Collect context from all tools concurrently.
+        
+        Each tool's get_context runs in the default executor; results are
+        joined in tool order. The result is reused for later prompts built
+        with the same tools unless refresh is set. On refresh, tools whose
+        context is session_stable keep their earlier result.
+        
+        Args:
+            tools: List of tool instances.
+            refresh: Whether to gather the context again even if it is cached.
+            
+        Returns:
+            str: Combined system context.
+        """
+        key = tuple(tools)
+        if not refresh and self._tools_context is not None and self._tools_context[0] == key:
+            return self._tools_context[1]
+        
+        pending = [
+            tool for tool in tools
+            if (refresh and not tool.session_stable)
+            or self._tool_results.get(tool) is None
+            or isinstance(self._tool_results[tool], Exception)
+        ]
+        loop = asyncio.get_running_loop()
+        results = await asyncio.gather(
+            *(
+                asyncio.wrap_future(self._prefetched_contexts.pop(tool))
+                if tool in self._prefetched_contexts
+                else loop.run_in_executor(None, tool.get_context)
+                for tool in pending
+            ),
+            return_exceptions=True,
+        )
+        self._tool_results.update(zip(pending, results))
+        
         context_parts = []
         for tool in tools:
-            try:
-                context = tool.get_context()
-                if context:
-                    context_parts.append(f"--- {tool.name} ---")
-                    context_parts.append(context)
-            except Exception as e:
-                context_parts.append(f"Error getting context from {tool.name}: {str(e)}")
+            context = self._tool_results[tool]
+            if isinstance(context, Exception):
+                context_parts.append(f"Error getting context from {tool.name}: {str(context)}")
+            elif context:
+                context_parts.append(f"--- {tool.name} ---")
+                context_parts.append(context)
         
         # Join all context parts
         system_context = "\n\n".join(context_parts)
+        self._tools_context = (key, system_context)
         return system_context
 
-    def build_explanation_system_prompt(self, tools: List[BaseTool]):
-        """Build the explanation system prompt with context from tools.
+    async def _format_with_tools_context(
+        self, template: str, tools: List[BaseTool], refresh: bool = False
+    ) -> str:
+        """Format a shell prompt template with the shell and tool context.
         
         Args:
+            template: Template with {shell} and {system_context} fields.
             tools: List of tool instances.
+            refresh: Whether to gather the tool context again even if cached.
             
         Returns:
             str: Formatted system prompt.
         """
-        system_context = self._gather_tools_context(tools)
+        system_context = await self._gather_tools_context(tools, refresh=refresh)
+        
+        # Prompts built again with unchanged context (e.g. on each
+        # regeneration) reuse the formatted string
+        cached = self._formatted_prompts.get(template)
+        if cached is not None and cached[0] == system_context:
+            return cached[1]
+        
+        prompt = template.format(shell=self.shell, system_context=system_context)
+        self._formatted_prompts[template] = (system_context, prompt)
+        return prompt
 
-        return self.EXPLANATION_SYSTEM_PROMPT.format(
-            shell=self.shell,
-            system_context=system_context
-        )
+    @staticmethod
+    @functools.lru_cache(maxsize=16)
+    def _format_with_language(template: str, language: str = None) -> str:
+        """Format a git commit prompt template with the language instruction.
+        
+        Args:
+            template: Template with a {language_instruction} field.
+            language: Language for commit message generation.
+            
+        Returns:
+            str: Formatted system prompt.
+        """
+        language_instruction = ""
+        if language:
+            language_instruction = f"Generate the commit message in {language}."
+        return template.format(language_instruction=language_instruction)
 
-    def build_system_prompt(self, tools: List[BaseTool]) -> str:
-        """Build the system prompt with context from tools.
+    async def build_explanation_system_prompt(self, tools: List[BaseTool]):
+        """Build the explanation system prompt with context from tools.
         
         Args:
             tools: List of tool instances.
@@ -149,13 +245,18 @@ Generate only the command, nothing else."""
         Returns:
             str: Formatted system prompt.
         """
-        system_context = self._gather_tools_context(tools)
+        return await self._format_with_tools_context(self.EXPLANATION_SYSTEM_PROMPT, tools)
+
+    async def build_system_prompt(self, tools: List[BaseTool]) -> str:
+        """Build the system prompt with context from tools.
         
-        # Format the base prompt with shell and system context
-        return self.BASE_SYSTEM_PROMPT.format(
-            shell=self.shell,
-            system_context=system_context,
-        )
+        Args:
+            tools: List of tool instances.
+            
+        Returns:
+            str: Formatted system prompt.
+        """
+        return await self._format_with_tools_context(self.BASE_SYSTEM_PROMPT, tools)
     
     def build_git_commit_system_prompt(self, language: str = None) -> str:
         """Build the system prompt for git commit message generation.
@@ -166,13 +267,7 @@ Generate only the command, nothing else."""
         Returns:
             str: Formatted system prompt for git commit message generation.
         """
-        language_instruction = ""
-        if language:
-            language_instruction = f"Generate the commit message in {language}."
-            
-        return self.GIT_COMMIT_SYSTEM_PROMPT.format(
-            language_instruction=language_instruction
-        )
+        return self._format_with_language(self.GIT_COMMIT_SYSTEM_PROMPT, language)
 
     def load_prompt_from_file(self, file_path: str) -> str:
         """Load a prompt from a file.
@@ -189,22 +284,19 @@ Generate only the command, nothing else."""
         except Exception as e:
             return f"Error loading prompt file: {str(e)}"
             
-    def build_fixing_system_prompt(self, tools: List[BaseTool]) -> str:
+    async def build_fixing_system_prompt(self, tools: List[BaseTool]) -> str:
         """Build the system prompt for fixing failed commands with context from tools.
         
+        The tool context is always gathered again, since the failed command
+        may have changed the directory or environment.
+        
         Args:
             tools: List of tool instances.
             
         Returns:
             str: Formatted system prompt for command fixing.
         """
-        system_context = self._gather_tools_context(tools)
-        
-        # Format the fixing prompt with shell and system context
-        return self.FIXING_SYSTEM_PROMPT.format(
-            shell=self.shell,
-            system_context=system_context
-        )
+        return await self._format_with_tools_context(self.FIXING_SYSTEM_PROMPT, tools, refresh=True)
     
     def build_fixing_user_prompt(
         self,
@@ -239,27 +331,49 @@ Please provide a fixed version of this command or a completely different command
         
         return user_prompt
         
-    def build_git_commit_user_prompt(self, git_diff: str, changed_files_content: dict = None) -> str:
-        """Build the user prompt for commit message generation.
+    def build_git_changes_section(self, git_diff: str, changed_files_content: dict = None) -> str:
+        """Build the diff and changed-files section shared by the nlgc user prompts.
+        
+        The section doesn't change between regenerations, so callers that build
+        several prompts for the same changes can build it once and pass it in.
         
         Args:
             git_diff: Git diff output.
             changed_files_content: Dict of file contents.
             
         Returns:
-            str: Formatted user prompt for commit message generation.
+            str: Formatted changes section.
         """
-        user_prompt = "Generate a commit message for the following changes:\n\n"
-        user_prompt += "Git Diff:\n```diff\n" + git_diff + "\n```\n\n"
+        parts = ["Git Diff:\n```diff\n", git_diff, "\n```\n\n"]
         
         # Add file content if available
         if changed_files_content:
-            user_prompt += "Full content of changed files:\n"
+            parts.append(self.GIT_FILE_CONTENT_HEADER)
             for file_path, content in changed_files_content.items():
-                user_prompt += f"--- {file_path} ---\n"
-                user_prompt += content + "\n\n"
-                
-        return user_prompt
+                parts.extend((f"--- {file_path} ---\n", content, "\n\n"))
+        
+        return "".join(parts)
+
+    def build_git_commit_user_prompt(
+        self,
+        git_diff: str,
+        changed_files_content: dict = None,
+        changes_section: Optional[str] = None
+    ) -> str:
+        """Build the user prompt for commit message generation.
+        
+        Args:
+            git_diff: Git diff output.
+            changed_files_content: Dict of file contents.
+            changes_section: Prebuilt result of build_git_changes_section; when
+                given, git_diff and changed_files_content are not used.
+            
+        Returns:
+            str: Formatted user prompt for commit message generation.
+        """
+        if changes_section is None:
+            changes_section = self.build_git_changes_section(git_diff, changed_files_content)
+        return "Generate a commit message for the following changes:\n\n" + changes_section
 
     def build_stdin_processing_system_prompt(self) -> str:
         """Build the system prompt for STDIN processing (no system context needed).
@@ -284,7 +398,7 @@ Please provide a fixed version of this command or a completely different command
 Input content:
 {stdin_content}"""
 
-    def build_regeneration_system_prompt(self, tools: List[BaseTool]) -> str:
+    async def build_regeneration_system_prompt(self, tools: List[BaseTool]) -> str:
         """Build the system prompt for command regeneration with context from tools.
         
         Args:
@@ -293,13 +407,7 @@ Input content:
         Returns:
             str: Formatted system prompt for command regeneration.
         """
-        system_context = self._gather_tools_context(tools)
-        
-        # Format the regeneration prompt with shell and system context
-        return self.REGENERATION_SYSTEM_PROMPT.format(
-            shell=self.shell,
-            system_context=system_context
-        )
+        return await self._format_with_tools_context(self.REGENERATION_SYSTEM_PROMPT, tools)
 
     def build_regeneration_user_prompt(self, original_request: str, declined_commands: List[dict]) -> str:
         """Build user prompt for command regeneration with notes.
@@ -339,19 +447,14 @@ Input content:
         Returns:
             str: Formatted system prompt for git commit message regeneration.
         """
-        language_instruction = ""
-        if language:
-            language_instruction = f"Generate the commit message in {language}."
-            
-        return self.GIT_COMMIT_REGENERATION_SYSTEM_PROMPT.format(
-            language_instruction=language_instruction
-        )
+        return self._format_with_language(self.GIT_COMMIT_REGENERATION_SYSTEM_PROMPT, language)
 
     def build_git_commit_regeneration_user_prompt(
         self, 
         git_diff: str, 
         changed_files_content: dict = None, 
-        declined_messages: List[str] = []
+        declined_messages: Optional[List[str]] = None,
+        changes_section: Optional[str] = None
     ) -> str:
         """Build the user prompt for git commit message regeneration.
         
@@ -359,25 +462,21 @@ Input content:
             git_diff: Git diff output.
             changed_files_content: Dict of file contents.
             declined_messages: List of previously declined commit messages.
+            changes_section: Prebuilt result of build_git_changes_section; when
+                given, git_diff and changed_files_content are not used.
             
         Returns:
             str: Formatted user prompt for git commit message regeneration.
         """
-        user_prompt = "Generate a different commit message for the following changes:\n\n"
-        user_prompt += "Git Diff:\n```diff\n" + git_diff + "\n```\n\n"
-        
-        # Add file content if available
-        if changed_files_content:
-            user_prompt += "Full content of changed files:\n"
-            for file_path, content in changed_files_content.items():
-                user_prompt += f"--- {file_path} ---\n"
-                user_prompt += content + "\n\n"
+        if changes_section is None:
+            changes_section = self.build_git_changes_section(git_diff, changed_files_content)
+        parts = ["Generate a different commit message for the following changes:\n\n", changes_section]
         
         # Add declined messages
         if declined_messages:
-            user_prompt += "Previously declined commit messages:\n\n"
+            parts.append("Previously declined commit messages:\n\n")
             for i, message in enumerate(declined_messages, 1):
-                user_prompt += f"* Declined commit message {i}:\n{message}\n\n"
-            user_prompt += "\n\nPlease generate a different commit message that better summarizes the changes.\n"
+                parts.append(f"* Declined commit message {i}:\n{message}\n\n")
+            parts.append("\n\nPlease generate a different commit message that better summarizes the changes.\n")
                 
-        return user_prompt
+        return "".join(parts)
@@ -0,0 +1,108 @@
+"""
+Response cache for nlsh and nlgc.
+
+This module stores LLM responses on disk, keyed by a hash of the backend and
+prompts, so identical requests can be answered without calling the backend.
+"""
+
+import functools
+import hashlib
+import os
+import tempfile
+import time
+from typing import Dict, Optional, Set
+
+# Responses read or written by this process, keyed by cache path
+_memory_cache: Dict[str, str] = {}
+
+# Cache directories this process has already created
+_ready_dirs: Set[str] = set()
+
+
+@functools.lru_cache(maxsize=1)
+def _get_cache_root() -> str:
+    """Get the nlsh cache root, resolved once per process.
+
+    Returns:
+        str: $XDG_CACHE_HOME/nlsh, or ~/.cache/nlsh when XDG_CACHE_HOME is unset.
+    """
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(cache_home, "nlsh")
+
+
+def get_cache_path(namespace: str, url: str, model: str, system_prompt: str, user_prompt: str) -> str:
+    """Get the cache file path for a request.
+
+    The file name is a SHA-256 over the backend URL and model and both prompts,
+    under $XDG_CACHE_HOME/nlsh/<namespace> (~/.cache/nlsh/<namespace> by default).
+
+    Args:
+        namespace: Cache subdirectory (e.g. "commits", "explanations").
+        url: Backend URL.
+        model: Backend model name.
+        system_prompt: System prompt sent with the request.
+        user_prompt: User prompt sent with the request.
+
+    Returns:
+        str: Path of the cache file.
+    """
+    digest = hashlib.sha256()
+    for part in (url or "", model or "", system_prompt, user_prompt):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return os.path.join(_get_cache_root(), namespace, digest.hexdigest())
+
+
+def read_cached_response(cache_path: str, ttl: int) -> Optional[str]:
+    """Read a cached response if it exists and is younger than ttl seconds.
+
+    Args:
+        cache_path: Path returned by get_cache_path.
+        ttl: Maximum age of the entry in seconds.
+
+    Returns:
+        Optional[str]: The cached response, or None on a miss.
+    """
+    if cache_path in _memory_cache:
+        return _memory_cache[cache_path]
+
+    try:
+        if time.time() - os.stat(cache_path).st_mtime > ttl:
+            return None
+        with open(cache_path, "r", encoding="utf-8") as f:
+            response = f.read()
+    except (OSError, UnicodeDecodeError):
+        return None
+
+    if not response:
+        return None
+    _memory_cache[cache_path] = response
+    return response
+
+
+def write_cached_response(cache_path: str, response: str) -> None:
+    """Atomically write a response to the cache, ignoring failures.
+
+    Args:
+        cache_path: Path returned by get_cache_path.
+        response: Response to store; empty responses are not cached.
+    """
+    if not response:
+        return
+    _memory_cache[cache_path] = response
+
+    try:
+        cache_dir = os.path.dirname(cache_path)
+        if cache_dir not in _ready_dirs:
+            os.makedirs(cache_dir, exist_ok=True)
+            _ready_dirs.add(cache_dir)
+        fd, temp_path = tempfile.mkstemp(dir=cache_dir, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(response)
+            os.replace(temp_path, cache_path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+    except OSError:
+        pass
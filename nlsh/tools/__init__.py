@@ -5,30 +5,41 @@ This module provides various tools that gather system information
 to enhance the context provided to the LLM.
 """
 
+import functools
+
 from nlsh.tools.directory import DirLister
 from nlsh.tools.environment import EnvInspector
 from nlsh.tools.system import SystemInfo
 
 from nlsh.config import Config
 
-# Register all available tools
+# Register all available tools, ordered from the most stable context to the
+# most volatile so the shared prompt prefix is as long as possible
 AVAILABLE_TOOLS = {
-    "DirLister": DirLister,
-    "EnvInspector": EnvInspector,
     "SystemInfo": SystemInfo,
+    "EnvInspector": EnvInspector,
+    "DirLister": DirLister,
 }
 
 def get_tool_class(tool_name):
     """Get a tool class by name."""
     return AVAILABLE_TOOLS.get(tool_name)
 
+@functools.lru_cache(maxsize=4)
+def _get_tool_instances(config: Config):
+    """Create one instance of each available tool for a configuration object."""
+    return tuple(tool(config) for tool in AVAILABLE_TOOLS.values())
+
 def get_tools(config: Config):
     """Get instances of all available tools.
     
+    Instances are shared by all calls with the same configuration object, so
+    tools must not keep per-call state.
+    
     Args:
         config: Configuration object.
 
     Returns:
         list: List of tool instances.
     """
-    return [tool(config) for tool in AVAILABLE_TOOLS.values()]
+    return list(_get_tool_instances(config))
@@ -13,6 +13,10 @@ class BaseTool(ABC):
     All tools must inherit from this class and implement the get_context method.
     """
     
+    # Whether get_context returns the same result for the life of the process,
+    # so it need not be gathered again when the context is refreshed
+    session_stable = False
+    
     def __init__(self, config):
         """Initialize the tool with configuration.
         
@@ -7,11 +7,14 @@ This module provides a tool for listing files in the current directory.
 import os
 import stat
 import shlex
-from datetime import datetime
-from typing import Dict, List
+import time
+from typing import Optional
 
 from nlsh.tools.base import BaseTool
 
+# File size units, each 1024 times the previous one
+_SIZE_UNITS = ('B', 'KB', 'MB', 'GB', 'TB')
+
 
 class DirLister(BaseTool):
     """Lists non-hidden files in current directory with basic metadata."""
@@ -28,27 +31,36 @@ class DirLister(BaseTool):
         # Use shlex.quote to escape special characters
         return shlex.quote(path)
     
-    def _format_file_info(self, entry: os.DirEntry) -> Dict[str, str]:
-        """Format file information safely.
+    def _format_entry(self, entry: os.DirEntry, name: str) -> Optional[str]:
+        """Format a directory entry as a listing line.
+        
+        Uses a single stat per entry (cached by the DirEntry) and derives the
+        file type from its mode.
         
         Args:
             entry: Directory entry.
+            name: Sanitized entry name.
             
         Returns:
-            Dict[str, str]: Formatted file information.
+            Optional[str]: Formatted listing line, or None if the entry cannot be read.
         """
         try:
             stats = entry.stat()
-            return {
-                'name': self._sanitize_path(entry.name),
-                'type': ("Directory" if entry.is_dir() else 
-                        "Executable" if entry.is_file() and stats.st_mode & stat.S_IXUSR else 
-                        "File"),
-                'size': self._format_size(stats.st_size),
-                'modified': datetime.fromtimestamp(stats.st_mtime).strftime('%Y-%m-%d %H:%M:%S')
-            }
         except (PermissionError, FileNotFoundError):
             return None
+        
+        mode = stats.st_mode
+        if stat.S_ISDIR(mode):
+            file_type = "Directory"
+        elif stat.S_ISREG(mode) and mode & stat.S_IXUSR:
+            file_type = "Executable"
+        else:
+            file_type = "File"
+        modified = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(stats.st_mtime))
+        return (
+            f"- {name} "
+            f"({file_type}, {self._format_size(stats.st_size)}, modified: {modified})"
+        )
     
     def get_context(self):
         """Get a listing of files in the current directory.
@@ -60,24 +72,23 @@ class DirLister(BaseTool):
         result = [f"Current directory: {current_dir}"]
         result.append("Files:")
         
-        # Get all non-hidden files in the current directory
+        # Format all non-hidden files in the current directory
         files = []
-        for entry in os.scandir(current_dir):
-            # Skip hidden files (those starting with .)
-            if entry.name.startswith('.'):
-                continue
+        with os.scandir(current_dir) as entries:
+            for entry in entries:
+                # Skip hidden files (those starting with .)
+                if entry.name.startswith('.'):
+                    continue
                 
-            file_info = self._format_file_info(entry)
-            if file_info:
-                files.append(file_info)
+                name = self._sanitize_path(entry.name)
+                line = self._format_entry(entry, name)
+                if line:
+                    files.append((name, line))
         
         # Sort files by name
-        files.sort(key=lambda x: x['name'])
-        
-        # Format file information
-        for file in files:
-            result.append(f"- {file['name']} ({file['type']}, {file['size']}, modified: {file['modified']})")
+        files.sort()
         
+        result.extend(line for _, line in files)
         return "\n".join(result)
     
     def _format_size(self, size_bytes):
@@ -89,7 +100,7 @@ class DirLister(BaseTool):
         Returns:
             str: Formatted file size.
         """
-        for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
-            if size_bytes < 1024 or unit == 'TB':
-                return f"{size_bytes:.2f} {unit}"
-            size_bytes /= 1024
+        # Each unit is 2**10 times the previous one, so the unit index follows
+        # from the bit length of the size
+        unit = min(max(size_bytes.bit_length() - 1, 0) // 10, len(_SIZE_UNITS) - 1)
+        return f"{size_bytes / (1 << (unit * 10)):.2f} {_SIZE_UNITS[unit]}"
@@ -5,7 +5,6 @@ This module provides a tool for inspecting environment variables.
 """
 
 import os
-import re
 
 from nlsh.tools.base import BaseTool
 
@@ -13,22 +12,25 @@ from nlsh.tools.base import BaseTool
 class EnvInspector(BaseTool):
     """Reports environment variables for compatibility checks."""
     
-    # List of sensitive environment variable patterns to filter out
-    SENSITIVE_ENV_PATTERNS = [
-        r'.*TOKEN.*',
-        r'.*SECRET.*',
-        r'.*PASSWORD.*',
-        r'.*KEY.*',
-        r'.*CREDENTIAL.*',
-        r'.*AUTH.*',
-        r'.*ACCOUNT.*',
-        r'.*NAME.*',
-        r'.*EMAIL.*',
-        r'.*ID.*',
-    ]
+    # Commands run in child processes, so nlsh's own environment never changes
+    session_stable = True
     
-    # List of important environment variables to always include
-    IMPORTANT_ENV_VARS = [
+    # Substrings that mark an environment variable name as sensitive
+    SENSITIVE_ENV_KEYWORDS = (
+        'TOKEN',
+        'SECRET',
+        'PASSWORD',
+        'KEY',
+        'CREDENTIAL',
+        'AUTH',
+        'ACCOUNT',
+        'NAME',
+        'EMAIL',
+        'ID',
+    )
+    
+    # Set of important environment variables to always include
+    IMPORTANT_ENV_VARS = frozenset({
         'PATH',
         'SHELL',
         'HOME',
@@ -39,7 +41,10 @@ class EnvInspector(BaseTool):
         'EDITOR',
         'PAGER',
         'PWD',
-    ]
+    })
+    
+    # Important variables in the order they are reported
+    _SORTED_IMPORTANT_ENV_VARS = tuple(sorted(IMPORTANT_ENV_VARS))
     
     def get_context(self):
         """Get environment variables information.
@@ -49,22 +54,13 @@ class EnvInspector(BaseTool):
         """
         env_info = ["Environment Variables:"]
         
-        # Get all environment variables
-        env_vars = dict(os.environ)
-        
-        # Filter out sensitive information
-        filtered_env = {}
-        for key, value in env_vars.items():
-            # Always include important variables
-            if key in self.IMPORTANT_ENV_VARS:
-                filtered_env[key] = value
-                continue
-                
-            # Filter out sensitive variables
-            if any(re.match(pattern, key, re.IGNORECASE) for pattern in self.SENSITIVE_ENV_PATTERNS):
-                filtered_env[key] = "[REDACTED]"
-            else:
-                filtered_env[key] = value
+        # Copy all environment variables in one pass, redacting sensitive ones
+        # but always including important variables
+        important = self.IMPORTANT_ENV_VARS
+        filtered_env = {
+            key: "[REDACTED]" if key not in important and self._is_sensitive(key) else value
+            for key, value in os.environ.items()
+        }
         
         # Get shell information
         shell = filtered_env.get('SHELL', 'Unknown')
@@ -72,22 +68,36 @@ class EnvInspector(BaseTool):
         
         # Add PATH information (useful for command availability)
         path = filtered_env.get('PATH', '')
-        path_entries = path.split(os.pathsep)
         env_info.append("PATH entries:")
-        for entry in path_entries:
-            if entry:  # Skip empty entries
-                env_info.append(f"- {entry}")
+        env_info.extend(
+            f"- {entry}" for entry in path.split(os.pathsep)
+            if entry  # Skip empty entries
+        )
         
         # Add other important environment variables
         env_info.append("\nOther important environment variables:")
-        for key in sorted(self.IMPORTANT_ENV_VARS):
-            if key != 'PATH' and key in filtered_env:  # PATH already handled above
-                env_info.append(f"{key}={filtered_env[key]}")
+        env_info.extend(
+            f"{key}={filtered_env[key]}" for key in self._SORTED_IMPORTANT_ENV_VARS
+            if key != 'PATH' and key in filtered_env  # PATH already handled above
+        )
         
         # Add remaining environment variables
         env_info.append("\nAdditional environment variables:")
-        for key in sorted(filtered_env.keys()):
-            if key not in self.IMPORTANT_ENV_VARS:
-                env_info.append(f"{key}={filtered_env[key]}")
+        env_info.extend(
+            f"{key}={filtered_env[key]}"
+            for key in sorted(filtered_env.keys() - self.IMPORTANT_ENV_VARS)
+        )
         
         return "\n".join(env_info)
+    
+    def _is_sensitive(self, key):
+        """Check whether an environment variable name looks sensitive.
+        
+        Args:
+            key: Environment variable name.
+            
+        Returns:
+            bool: True if the name contains any sensitive keyword.
+        """
+        upper_key = key.upper()
+        return any(keyword in upper_key for keyword in self.SENSITIVE_ENV_KEYWORDS)